@@ -0,0 +1,1104 @@
+import mysql.connector
+from datetime import datetime
+from contextlib import contextmanager
+import logging
+import queue
+import random
+import threading
+import time
+
+INVENTORY_SUMMARY_SQL = '''
+    SELECT i.inventory_id, p.product_id, p.name, i.quantity, i.status, w.name, l.zone, l.aisle, l.bin
+    FROM inventory i
+    JOIN products p ON i.product_id = p.product_id
+    JOIN locations l ON i.location_id = l.location_id
+    JOIN warehouses w ON l.warehouse_id = w.warehouse_id
+'''
+
+# One alert row per threshold the batch falls within, same as check_expiry_alerts
+EXPIRY_ALERTS_SQL = '''
+    SELECT sb.product_id, sb.serial_or_batch_number, t.days
+    FROM serial_batches sb
+    JOIN (SELECT 30 AS days UNION ALL SELECT 60 UNION ALL SELECT 90) t
+      ON DATEDIFF(sb.expiry_date, CURDATE()) BETWEEN 0 AND t.days
+    ORDER BY sb.id, t.days
+'''
+
+# The inventory summary plus each row's location, paged by API clients that write back to the rows
+INVENTORY_PAGE_SQL = '''
+    SELECT i.inventory_id, p.product_id, p.name, i.quantity, i.status, w.name, l.zone, l.aisle, l.bin, i.location_id
+    FROM inventory i
+    JOIN products p ON i.product_id = p.product_id
+    JOIN locations l ON i.location_id = l.location_id
+    JOIN warehouses w ON l.warehouse_id = w.warehouse_id
+'''
+
+REORDER_ALERTS_SQL = '''
+    SELECT i.product_id, i.quantity, r.min_threshold, r.reorder_point
+    FROM inventory i
+    JOIN reorder_rules r ON i.product_id = r.product_id
+    WHERE r.auto_order_enabled = 1 AND i.quantity <= r.min_threshold
+'''
+
+# Reorder rows keyed by inventory row; the last column says whether the row is alerting, so a
+# report updated from changed rows knows which to drop
+REORDER_ALERT_ROWS_SQL = '''
+    SELECT i.inventory_id, i.product_id, i.quantity, r.min_threshold, r.reorder_point,
+           r.auto_order_enabled = 1 AND i.quantity <= r.min_threshold
+    FROM inventory i
+    JOIN reorder_rules r ON i.product_id = r.product_id
+'''
+
+AUDIT_LOGS_SQL = 'SELECT * FROM audit_logs'
+
+STOCK_MOVEMENTS_SQL = 'SELECT movement_id, product_id, quantity, from_location, to_location, movement_type, timestamp FROM stock_movements'
+
+# Tables whose change version is bumped by every DatabaseManager write
+TRACKED_TABLES = ["products", "warehouses", "locations", "inventory", "serial_batches", "batch_stock",
+                  "stock_movements", "reorder_rules", "audit_logs"]
+
+INVENTORY_STATUSES = ["available", "reserved", "in-transit", "damaged"]
+MOVEMENT_TYPES = ["transfer", "sale", "return", "restock"]
+
+# Differences between a cycle count and inventory over the count's warehouse (and zone): every
+# inventory row in scope that was counted differently or not found, plus counted stock with no row.
+# Parameters: count_id, count_id.
+CYCLE_COUNT_VARIANCES_SQL = '''
+    SELECT i.inventory_id, i.product_id, i.location_id, i.quantity, COALESCE(c.counted_quantity, 0), i.version
+    FROM cycle_counts cc
+    JOIN locations l ON l.warehouse_id = cc.warehouse_id AND (cc.zone IS NULL OR l.zone = cc.zone)
+    JOIN inventory i ON i.location_id = l.location_id
+    LEFT JOIN cycle_count_lines c
+        ON c.count_id = cc.count_id AND c.product_id = i.product_id AND c.location_id = i.location_id
+    WHERE cc.count_id = %s AND i.quantity <> COALESCE(c.counted_quantity, 0)
+    UNION ALL
+    SELECT NULL, c.product_id, c.location_id, 0, c.counted_quantity, NULL
+    FROM cycle_count_lines c
+    LEFT JOIN inventory i ON i.product_id = c.product_id AND i.location_id = c.location_id
+    WHERE c.count_id = %s AND i.inventory_id IS NULL AND c.counted_quantity <> 0
+    ORDER BY 3, 2
+'''
+
+# Report name -> query, shared by the GUI exports and the command-line exports
+REPORT_QUERIES = {
+    "inventory_summary": INVENTORY_SUMMARY_SQL,
+    "expiry_alerts": EXPIRY_ALERTS_SQL,
+    "reorder_alerts": REORDER_ALERTS_SQL,
+    "audit_logs": AUDIT_LOGS_SQL,
+    "stock_movements": STOCK_MOVEMENTS_SQL,
+}
+
+# Optimistic concurrency: conflicting writes are retried this many times, sleeping a random
+# time of up to RETRY_BASE_DELAY * 2^attempt seconds (capped at RETRY_MAX_DELAY) in between
+WRITE_RETRIES = 5
+RETRY_BASE_DELAY = 0.005
+RETRY_MAX_DELAY = 0.2
+# MySQL deadlock, lock wait timeout and duplicate key (two writers inserting the same
+# product/location row); all are retried like version conflicts
+RETRYABLE_ERRNOS = (1213, 1205, 1062)
+
+# Raised when a compare-and-set update finds the row changed since it was read. Not retryable
+# when the versions were read by the caller in an earlier transaction, so a retry cannot help.
+class ConcurrentUpdateError(mysql.connector.Error):
+    def __init__(self, msg=None, retryable=True):
+        super().__init__(msg)
+        self.retryable = retryable
+
+def _is_conflict(error):
+    return (isinstance(error, ConcurrentUpdateError) and error.retryable) or (
+        isinstance(error, mysql.connector.Error) and getattr(error, "errno", None) in RETRYABLE_ERRNOS)
+
+# Per-operation commit, conflict and failure counts, shared by every DatabaseManager in the process
+class WriteMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def record(self, operation, attempts, conflicts, committed):
+        with self.lock:
+            counts = self.counts.setdefault(operation, {"committed": 0, "failed": 0, "attempts": 0, "conflicts": 0})
+            counts["committed" if committed else "failed"] += 1
+            counts["attempts"] += attempts
+            counts["conflicts"] += conflicts
+
+    def snapshot(self):
+        # conflict_rate is the share of transaction attempts that hit a conflict
+        with self.lock:
+            return {operation: {**counts, "conflict_rate": round(counts["conflicts"] / counts["attempts"], 4)}
+                    for operation, counts in self.counts.items()}
+
+    def reset(self):
+        with self.lock:
+            self.counts = {}
+
+WRITE_METRICS = WriteMetrics()
+
+# Tables each report reads, used by clients to decide when an open report is stale
+REPORT_TABLES = {
+    "inventory_summary": ("inventory", "products", "locations", "warehouses"),
+    "expiry_alerts": ("serial_batches",),
+    "reorder_alerts": ("inventory", "reorder_rules"),
+    "audit_logs": ("audit_logs",),
+    "stock_movements": ("stock_movements",),
+}
+
+# Database Manager Class for MySQL
+class DatabaseManager:
+    def __init__(self, host="127.0.0.1", user="root", password="", database="inventory_db", ensure_schema=True):
+        self.connection_args = {"host": host, "user": user, "password": password, "database": database}
+        self._pending_changes = None
+        # Versions bumped by the last committed write
+        self.last_versions = {}
+        try:
+            self.conn = mysql.connector.connect(**self.connection_args)
+            self.cursor = self.conn.cursor()
+            if ensure_schema:
+                self.create_tables()
+            logging.info("Database connection established")
+        except mysql.connector.Error as e:
+            logging.error(f"Database connection failed: {e}")
+            raise
+
+    def create_tables(self):
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS products (
+                product_id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                description TEXT,
+                category VARCHAR(100)
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS warehouses (
+                warehouse_id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                location VARCHAR(255)
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS locations (
+                location_id INT AUTO_INCREMENT PRIMARY KEY,
+                warehouse_id INT,
+                zone VARCHAR(50),
+                aisle VARCHAR(50),
+                bin VARCHAR(50),
+                FOREIGN KEY (warehouse_id) REFERENCES warehouses(warehouse_id) ON DELETE CASCADE
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS inventory (
+                inventory_id INT AUTO_INCREMENT PRIMARY KEY,
+                product_id INT,
+                location_id INT,
+                quantity INT,
+                status ENUM('available', 'reserved', 'in-transit', 'damaged'),
+                UNIQUE KEY uq_inventory_product_location (product_id, location_id),
+                FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE,
+                FOREIGN KEY (location_id) REFERENCES locations(location_id) ON DELETE CASCADE
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS serial_batches (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                product_id INT,
+                serial_or_batch_number VARCHAR(100),
+                type ENUM('serial', 'batch'),
+                expiry_date DATE,
+                received_date DATE,
+                FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stock_movements (
+                movement_id INT AUTO_INCREMENT PRIMARY KEY,
+                product_id INT,
+                quantity INT,
+                from_location INT,
+                to_location INT,
+                movement_type VARCHAR(50),
+                timestamp DATETIME,
+                FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE,
+                FOREIGN KEY (from_location) REFERENCES locations(location_id) ON DELETE SET NULL,
+                FOREIGN KEY (to_location) REFERENCES locations(location_id) ON DELETE SET NULL
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reorder_rules (
+                product_id INT,
+                min_threshold INT,
+                reorder_point INT,
+                auto_order_enabled BOOLEAN,
+                FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE,
+                PRIMARY KEY (product_id)
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS audit_logs (
+                audit_id INT AUTO_INCREMENT PRIMARY KEY,
+                inventory_id INT,
+                action VARCHAR(255),
+                reason TEXT,
+                changed_by VARCHAR(100),
+                timestamp DATETIME,
+                FOREIGN KEY (inventory_id) REFERENCES inventory(inventory_id) ON DELETE CASCADE
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS cycle_counts (
+                count_id INT AUTO_INCREMENT PRIMARY KEY,
+                warehouse_id INT NOT NULL,
+                zone VARCHAR(50),
+                status ENUM('open', 'applied') NOT NULL DEFAULT 'open',
+                created_by VARCHAR(100),
+                created_at DATETIME,
+                applied_by VARCHAR(100),
+                applied_at DATETIME,
+                FOREIGN KEY (warehouse_id) REFERENCES warehouses(warehouse_id) ON DELETE CASCADE
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS cycle_count_lines (
+                count_id INT,
+                product_id INT,
+                location_id INT,
+                counted_quantity INT NOT NULL,
+                PRIMARY KEY (count_id, location_id, product_id),
+                FOREIGN KEY (count_id) REFERENCES cycle_counts(count_id) ON DELETE CASCADE,
+                FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE,
+                FOREIGN KEY (location_id) REFERENCES locations(location_id) ON DELETE CASCADE
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INT AUTO_INCREMENT PRIMARY KEY,
+                username VARCHAR(50) UNIQUE,
+                password VARCHAR(255),
+                role ENUM('Admin', 'Warehouse Manager', 'Auditor')
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS batch_stock (
+                batch_id INT,
+                location_id INT,
+                quantity INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (batch_id, location_id),
+                FOREIGN KEY (batch_id) REFERENCES serial_batches(id) ON DELETE CASCADE,
+                FOREIGN KEY (location_id) REFERENCES locations(location_id) ON DELETE CASCADE
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS change_versions (
+                table_name VARCHAR(64) PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0
+            )
+        ''')
+        self.cursor.executemany('INSERT IGNORE INTO change_versions (table_name) VALUES (%s)', [(t,) for t in TRACKED_TABLES])
+        self._add_column_if_missing('inventory', 'change_seq', 'BIGINT NOT NULL DEFAULT 0')
+        self._add_column_if_missing('inventory', 'version', 'INT NOT NULL DEFAULT 0')
+        self._ensure_index('inventory', 'idx_inventory_change_seq', 'change_seq')
+        if not self._index_exists('inventory', 'uq_inventory_product_location'):
+            self._merge_duplicate_inventory()
+            self._ensure_index('inventory', 'uq_inventory_product_location', 'product_id, location_id', unique=True)
+        self._ensure_index('products', 'idx_products_name', 'name')
+        self.conn.commit()
+        logging.info("Database tables created or verified")
+
+    def _add_column_if_missing(self, table, column, definition):
+        self.cursor.execute('SELECT COUNT(*) FROM information_schema.columns '
+                          'WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s',
+                          (table, column))
+        if not self.cursor.fetchone()[0]:
+            self.cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+            logging.info(f"Column added: {table}.{column}")
+
+    def _index_exists(self, table, index_name):
+        self.cursor.execute('SELECT COUNT(*) FROM information_schema.statistics '
+                          'WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s',
+                          (table, index_name))
+        return bool(self.cursor.fetchone()[0])
+
+    def _ensure_index(self, table, index_name, columns, unique=False):
+        if not self._index_exists(table, index_name):
+            self.cursor.execute(f'CREATE {"UNIQUE " if unique else ""}INDEX {index_name} ON {table} ({columns})')
+            logging.info(f"Index created: {index_name}")
+
+    def _merge_duplicate_inventory(self):
+        # Databases from before the unique key may hold several rows per product and location.
+        # Each group is folded into its lowest inventory_id; audit logs move with it.
+        self.cursor.execute('''
+            SELECT product_id, location_id, MIN(inventory_id), SUM(quantity)
+            FROM inventory
+            GROUP BY product_id, location_id
+            HAVING COUNT(*) > 1
+        ''')
+        for product_id, location_id, keep_id, quantity in self.cursor.fetchall():
+            self.cursor.execute('UPDATE audit_logs a JOIN inventory i ON a.inventory_id = i.inventory_id '
+                              'SET a.inventory_id = %s WHERE i.product_id = %s AND i.location_id = %s',
+                              (keep_id, product_id, location_id))
+            self.cursor.execute('UPDATE inventory SET quantity = %s, version = version + 1 WHERE inventory_id = %s', (quantity, keep_id))
+            self.cursor.execute('DELETE FROM inventory WHERE product_id = %s AND location_id = %s AND inventory_id <> %s',
+                              (product_id, location_id, keep_id))
+            logging.info(f"Merged duplicate inventory rows: product_id={product_id}, location_id={location_id} into {keep_id}")
+
+    def bump_versions(self, *tables):
+        # Runs in the short publishing transaction after a data commit (see _publish_changes), so
+        # the version rows are locked only for that moment. Holding them until its commit makes
+        # versions visible in order.
+        versions = {}
+        for table in sorted(tables):
+            self.cursor.execute('UPDATE change_versions SET version = LAST_INSERT_ID(version + 1) WHERE table_name = %s', (table,))
+            versions[table] = self.cursor.lastrowid
+        return versions
+
+    def _finish_write(self, tables, inventory_ids=()):
+        # Records the tables and inventory rows a write changed; they are published once the
+        # write commits, so the data transaction never locks the shared change_versions rows
+        self._pending_changes = (list(tables), list(inventory_ids))
+
+    def _commit(self):
+        # Commits the current write and publishes its changes; returns the bumped versions
+        self.conn.commit()
+        return self._publish_changes()
+
+    def _publish_changes(self):
+        # Bumps the versions and stamps the touched inventory rows with the new inventory version
+        # in a transaction of its own. A failure here leaves the committed data in place; readers
+        # then see it only on their next full reload.
+        if not self._pending_changes:
+            return {}
+        tables, inventory_ids = self._pending_changes
+        self._pending_changes = None
+
+        def work():
+            versions = self.bump_versions(*tables)
+            ids = sorted(set(inventory_ids))
+            for start in range(0, len(ids), 1000):
+                chunk = ids[start:start + 1000]
+                self.cursor.execute(f'UPDATE inventory SET change_seq = %s WHERE inventory_id IN ({", ".join(["%s"] * len(chunk))})',
+                                  [versions["inventory"]] + chunk)
+            return versions
+
+        try:
+            self.last_versions = self._run_write("publish_changes", work, publish=False)
+        except mysql.connector.Error as e:
+            logging.error(f"Error publishing changes to {', '.join(tables)}: {e}")
+            self.last_versions = {}
+        return self.last_versions
+
+    def _run_write(self, operation, work, publish=True):
+        # Runs work() as one transaction and commits it. Version conflicts and deadlocks roll back
+        # and retry with jittered exponential backoff, up to WRITE_RETRIES times. The changes
+        # work() recorded with _finish_write are then published.
+        conflicts = 0
+        # End any read snapshot left open by earlier queries so the first attempt reads fresh rows
+        self.conn.commit()
+        while True:
+            self._pending_changes = None
+            try:
+                result = work()
+                self.conn.commit()
+                WRITE_METRICS.record(operation, conflicts + 1, conflicts, True)
+                break
+            except Exception as e:
+                self.conn.rollback()
+                conflict = _is_conflict(e)
+                if not conflict or conflicts >= WRITE_RETRIES:
+                    WRITE_METRICS.record(operation, conflicts + 1, conflicts + conflict, False)
+                    raise
+                conflicts += 1
+                logging.debug(f"{operation}: conflict {conflicts}, retrying: {e}")
+                time.sleep(random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** conflicts)))
+        if publish:
+            self._publish_changes()
+        return result
+
+    def get_change_versions(self):
+        # End the current read snapshot first so commits from other clients become visible
+        self.conn.commit()
+        self.cursor.execute('SELECT table_name, version FROM change_versions')
+        return dict(self.cursor.fetchall())
+
+    def get_inventory_changes(self, since_version):
+        # Inventory summary rows written after the given inventory version
+        self.cursor.execute(INVENTORY_SUMMARY_SQL + ' WHERE i.change_seq > %s ORDER BY i.change_seq', (since_version,))
+        return self.cursor.fetchall()
+
+    def get_inventory_rows_since(self, since_version):
+        # (inventory_id, product_id, location_id, quantity) of rows written after the given inventory version
+        self.cursor.execute('SELECT inventory_id, product_id, location_id, quantity FROM inventory WHERE change_seq > %s', (since_version,))
+        return self.cursor.fetchall()
+
+    def get_reorder_alert_rows(self, since_version=None):
+        # Every alerting row, or with since_version every rule-covered row written after it
+        if since_version is None:
+            self.cursor.execute(REORDER_ALERT_ROWS_SQL + ' WHERE r.auto_order_enabled = 1 AND i.quantity <= r.min_threshold')
+        else:
+            self.cursor.execute(REORDER_ALERT_ROWS_SQL + ' WHERE i.change_seq > %s', (since_version,))
+        return self.cursor.fetchall()
+
+    def get_expiry_alerts_since(self, after_batch_id=0):
+        # Expiry alerts of the batches with a higher id; returns (highest batch id read, alerts)
+        today = datetime.now().date()
+        last_id = after_batch_id
+        alerts = []
+        self.cursor.execute('SELECT id, product_id, serial_or_batch_number, expiry_date FROM serial_batches WHERE id > %s ORDER BY id',
+                          (after_batch_id,))
+        for batch_id, product_id, batch_number, expiry_date in self.cursor.fetchall():
+            last_id = batch_id
+            if expiry_date:
+                days_to_expiry = (expiry_date - today).days
+                for days in (30, 60, 90):
+                    if 0 <= days_to_expiry <= days:
+                        alerts.append((product_id, batch_number, days))
+        return last_id, alerts
+
+    def get_audit_logs(self, after_audit_id=0):
+        self.cursor.execute(AUDIT_LOGS_SQL + ' WHERE audit_id > %s ORDER BY audit_id', (after_audit_id,))
+        return self.cursor.fetchall()
+
+    def get_stock_movements(self, after_movement_id=0):
+        self.cursor.execute(STOCK_MOVEMENTS_SQL + ' WHERE movement_id > %s ORDER BY movement_id', (after_movement_id,))
+        return self.cursor.fetchall()
+
+    def add_product(self, name, description, category):
+        try:
+            self.cursor.execute('INSERT INTO products (name, description, category) VALUES (%s, %s, %s)',
+                              (name, description, category))
+            product_id = self.cursor.lastrowid
+            self._finish_write(["products"])
+            self._commit()
+            logging.info(f"Product added: {name}")
+            return product_id
+        except mysql.connector.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error adding product: {e}")
+            raise
+
+    def add_warehouse(self, name, location):
+        try:
+            self.cursor.execute('INSERT INTO warehouses (name, location) VALUES (%s, %s)', (name, location))
+            self._finish_write(["warehouses"])
+            self._commit()
+            logging.info(f"Warehouse added: {name}")
+        except mysql.connector.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error adding warehouse: {e}")
+            raise
+
+    def add_location(self, warehouse_id, zone, aisle, bin):
+        try:
+            self.cursor.execute('INSERT INTO locations (warehouse_id, zone, aisle, bin) VALUES (%s, %s, %s, %s)',
+                              (warehouse_id, zone, aisle, bin))
+            self._finish_write(["locations"])
+            self._commit()
+            logging.info(f"Location added: {zone}, {aisle}, {bin}")
+        except mysql.connector.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error adding location: {e}")
+            raise
+
+    def add_inventory(self, product_id, location_id, quantity, status):
+        def work():
+            inventory_id = self._upsert_inventory(product_id, location_id, quantity, status)
+            self._finish_write(["inventory"], [inventory_id])
+            return inventory_id
+
+        try:
+            return self._run_write("add_inventory", work)
+        except mysql.connector.Error as e:
+            logging.error(f"Error adding/updating inventory: {e}")
+            raise
+
+    def _upsert_inventory(self, product_id, location_id, quantity, status):
+        # Check if inventory record exists for product_id and location_id. A concurrent insert of the
+        # same pair fails on the unique key (1062) and the caller's retry then finds the row.
+        self.cursor.execute('SELECT inventory_id, quantity, version FROM inventory WHERE product_id = %s AND location_id = %s',
+                          (product_id, location_id))
+        existing = self.cursor.fetchone()
+        if existing:
+            inventory_id, current_quantity, version = existing
+            new_quantity = current_quantity + quantity
+            # Compare-and-set: only applies if nobody changed the row since it was read
+            self.cursor.execute('UPDATE inventory SET quantity = %s, status = %s, version = version + 1 WHERE inventory_id = %s AND version = %s',
+                              (new_quantity, status, inventory_id, version))
+            if self.cursor.rowcount == 0:
+                raise ConcurrentUpdateError(f"Inventory {inventory_id} was changed by another user")
+            logging.info(f"Updated inventory: product_id={product_id}, location_id={location_id}, new_quantity={new_quantity}")
+            return inventory_id
+        self.cursor.execute('INSERT INTO inventory (product_id, location_id, quantity, status) VALUES (%s, %s, %s, %s)',
+                          (product_id, location_id, quantity, status))
+        logging.info(f"Added new inventory: product_id={product_id}, location_id={location_id}, quantity={quantity}")
+        return self.cursor.lastrowid
+
+    def import_inventory(self, rows):
+        # rows: dicts with location_id, quantity, status and either product_id or name
+        # (plus optional description/category) for a product to create. One transaction.
+        def work():
+            imported = 0
+            created_products = 0
+            inventory_ids = []
+            for row in rows:
+                product_id = row.get("product_id")
+                if product_id:
+                    product_id = int(product_id)
+                else:
+                    if not row.get("name"):
+                        raise ValueError(f"Row {imported + 1}: product_id or name is required")
+                    self.cursor.execute('INSERT INTO products (name, description, category) VALUES (%s, %s, %s)',
+                                      (row["name"], row.get("description") or None, row.get("category") or None))
+                    product_id = self.cursor.lastrowid
+                    created_products += 1
+                quantity = int(row["quantity"])
+                if quantity < 0:
+                    raise ValueError(f"Row {imported + 1}: quantity cannot be negative")
+                inventory_ids.append(self._upsert_inventory(product_id, int(row["location_id"]), quantity, row.get("status") or "available"))
+                imported += 1
+            self._finish_write(["products", "inventory"], inventory_ids)
+            return {"rows": imported, "created_products": created_products}
+
+        try:
+            result = self._run_write("import_inventory", work)
+            logging.info(f"Inventory imported: {result['rows']} rows, {result['created_products']} new products")
+            return result
+        except (KeyError, ValueError, mysql.connector.Error) as e:
+            logging.error(f"Error importing inventory: {e}")
+            raise
+
+    def add_serial_batch(self, product_id, serial_or_batch_number, type, expiry_date, received_date, location_id=None, quantity=0):
+        # With a location and quantity the batch is also received there: its batch_stock row is
+        # created and the quantity is restocked into inventory in the same transaction
+        def work():
+            self.cursor.execute('INSERT INTO serial_batches (product_id, serial_or_batch_number, type, expiry_date, received_date) VALUES (%s, %s, %s, %s, %s)',
+                              (product_id, serial_or_batch_number, type, expiry_date, received_date))
+            batch_id = self.cursor.lastrowid
+            if location_id is not None and quantity > 0:
+                self.cursor.execute('INSERT INTO batch_stock (batch_id, location_id, quantity) VALUES (%s, %s, %s)',
+                                  (batch_id, location_id, quantity))
+                inventory_ids = self._apply_movements([(product_id, quantity, None, location_id, "restock")])
+                self._finish_write(["serial_batches", "batch_stock", "inventory", "stock_movements"], inventory_ids)
+            else:
+                self._finish_write(["serial_batches"])
+            return batch_id
+
+        try:
+            batch_id = self._run_write("add_serial_batch", work)
+            logging.info(f"Serial/Batch added: {serial_or_batch_number}")
+            return batch_id
+        except (ValueError, mysql.connector.Error) as e:
+            logging.error(f"Error adding serial/batch: {e}")
+            raise
+
+    def bulk_insert(self, table, columns, rows, id_column=None, key_columns=(), batch_size=5000):
+        # Inserts rows with multi-row INSERTs inside the current transaction, which the caller ends
+        # with commit_changes. With id_column, the generated ids are read back by key_columns, which
+        # must identify the new rows in the table, and returned as {key tuple: id}.
+        sql = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join(["%s"] * len(columns))})'
+        for start in range(0, len(rows), batch_size):
+            self.cursor.executemany(sql, rows[start:start + batch_size])
+        if not id_column:
+            return {}
+        positions = [columns.index(column) for column in key_columns]
+        keys = list(dict.fromkeys(tuple(row[p] for p in positions) for row in rows))
+        key_row = "(" + ", ".join(["%s"] * len(key_columns)) + ")"
+        ids = {}
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start:start + batch_size]
+            self.cursor.execute(f'SELECT {", ".join(key_columns)}, {id_column} FROM {table} '
+                                f'WHERE ({", ".join(key_columns)}) IN ({", ".join([key_row] * len(chunk))})',
+                                [value for key in chunk for value in key])
+            for row in self.cursor.fetchall():
+                ids[tuple(row[:-1])] = row[-1]
+        return ids
+
+    def commit_changes(self, tables, inventory_ids=()):
+        # Commits a transaction built with bulk_insert and publishes its changes; returns the bumped versions
+        self._finish_write(tables, inventory_ids)
+        return self._commit()
+
+    def log_movement(self, product_id, quantity, from_location, to_location, movement_type):
+        try:
+            timestamp = datetime.now()
+            self.cursor.execute('INSERT INTO stock_movements (product_id, quantity, from_location, to_location, movement_type, timestamp) VALUES (%s, %s, %s, %s, %s, %s)',
+                              (product_id, quantity, from_location, to_location, movement_type, timestamp))
+            self._finish_write(["stock_movements"])
+            self._commit()
+            logging.info(f"Movement logged: {movement_type}, product_id={product_id}")
+        except mysql.connector.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error logging movement: {e}")
+            raise
+
+    def record_movements(self, movements):
+        # movements: (product_id, quantity, from_location, to_location, movement_type) tuples.
+        # Logs every movement and applies the quantity changes in a single transaction. When a
+        # location is given only that location's row changes; otherwise sales and restocks
+        # apply to every row of the product as before.
+        def work():
+            inventory_ids = self._apply_movements(movements)
+            trimmed = self._trim_batch_stock(inventory_ids)
+            self._finish_write(["stock_movements", "inventory"] + (["batch_stock"] if trimmed else []), inventory_ids)
+
+        try:
+            self._run_write("record_movements", work)
+            logging.info(f"Movements recorded: {len(movements)}")
+            return self.last_versions
+        except (ValueError, mysql.connector.Error) as e:
+            logging.error(f"Error recording movements: {e}")
+            raise
+
+    def _apply_movements(self, movements):
+        # Logs the movements and applies their inventory deltas; the caller owns the transaction.
+        # Deltas are applied atomically in SQL, so they need no version check, but they bump the
+        # row version so concurrent read-modify-write updates notice them. A delta that would take
+        # a row below zero raises ValueError. Returns the touched ids.
+        timestamp = datetime.now()
+        deltas = {}
+        for product_id, quantity, from_location, to_location, movement_type in movements:
+            if from_location is not None and movement_type in ("sale", "transfer"):
+                key = (product_id, from_location)
+                deltas[key] = deltas.get(key, 0) - quantity
+            elif from_location is None and movement_type == "sale":
+                deltas[(product_id, None)] = deltas.get((product_id, None), 0) - quantity
+            if to_location is not None and movement_type in ("restock", "transfer", "return"):
+                key = (product_id, to_location)
+                deltas[key] = deltas.get(key, 0) + quantity
+            elif to_location is None and movement_type == "restock":
+                deltas[(product_id, None)] = deltas.get((product_id, None), 0) + quantity
+        self.cursor.executemany('INSERT INTO stock_movements (product_id, quantity, from_location, to_location, movement_type, timestamp) VALUES (%s, %s, %s, %s, %s, %s)',
+                              [(p, q, f, t, m, timestamp) for p, q, f, t, m in movements])
+        inventory_ids = []
+        for (product_id, location_id), delta in deltas.items():
+            if not delta:
+                continue
+            if location_id is None:
+                self.cursor.execute('SELECT inventory_id FROM inventory WHERE product_id = %s', (product_id,))
+            else:
+                self.cursor.execute('SELECT inventory_id FROM inventory WHERE product_id = %s AND location_id = %s', (product_id, location_id))
+            ids = [row[0] for row in self.cursor.fetchall()]
+            if ids:
+                # Stock never goes below zero: a row without enough stock refuses the whole write
+                self.cursor.executemany('UPDATE inventory SET quantity = quantity + %s, version = version + 1 WHERE inventory_id = %s AND quantity + %s >= 0',
+                                      [(delta, inventory_id, delta) for inventory_id in ids])
+                if self.cursor.rowcount != len(ids):
+                    raise ValueError(f"Insufficient stock of product {product_id}"
+                                     + (f" at location {location_id}" if location_id is not None else "") + f" for {-delta} units")
+                inventory_ids.extend(ids)
+            elif location_id is not None:
+                if delta < 0:
+                    raise ValueError(f"No inventory for product {product_id} at location {location_id}")
+                self.cursor.execute('INSERT INTO inventory (product_id, location_id, quantity, status) VALUES (%s, %s, %s, %s)',
+                                  (product_id, location_id, delta, "available"))
+                inventory_ids.append(self.cursor.lastrowid)
+        return inventory_ids
+
+    def _trim_batch_stock(self, inventory_ids):
+        # Batch stock at a location may never exceed the inventory there. Stock taken without naming
+        # batches (scan picks, API sales, count corrections) is removed from the batches the
+        # allocator would have picked first: unexpired batches by expiry, then batches without an
+        # expiry date, then expired ones. Returns whether any batch stock changed.
+        if not inventory_ids:
+            return False
+        ids = sorted(set(inventory_ids))
+        self.cursor.execute(f'''
+            SELECT i.inventory_id, i.quantity, bs.batch_id, bs.location_id, bs.quantity
+            FROM inventory i
+            JOIN serial_batches sb ON sb.product_id = i.product_id
+            JOIN batch_stock bs ON bs.batch_id = sb.id AND bs.location_id = i.location_id
+            WHERE i.inventory_id IN ({", ".join(["%s"] * len(ids))}) AND bs.quantity > 0
+            ORDER BY i.inventory_id, COALESCE(sb.expiry_date < CURDATE(), 0), sb.expiry_date IS NULL, sb.expiry_date, sb.received_date, bs.batch_id
+        ''', ids)
+        batches = {}
+        for inventory_id, on_hand, batch_id, location_id, quantity in self.cursor.fetchall():
+            batches.setdefault(inventory_id, (max(on_hand or 0, 0), []))[1].append((batch_id, location_id, quantity))
+        updates = []
+        for on_hand, rows in batches.values():
+            excess = sum(quantity for _, _, quantity in rows) - on_hand
+            for batch_id, location_id, quantity in rows:
+                if excess <= 0:
+                    break
+                taken = min(excess, quantity)
+                updates.append((taken, batch_id, location_id, taken))
+                excess -= taken
+        if not updates:
+            return False
+        # The batch rows were read without locks; a concurrent change makes the update miss and retry
+        self.cursor.executemany('UPDATE batch_stock SET quantity = quantity - %s WHERE batch_id = %s AND location_id = %s AND quantity >= %s',
+                              updates)
+        if self.cursor.rowcount != len(updates):
+            raise ConcurrentUpdateError("Batch stock was changed by another user")
+        return True
+
+    def record_allocations(self, allocations, movement_type, to_location=None):
+        # allocations: (product_id, batch_id, location_id, quantity) tuples from StockAllocator.allocate.
+        # Takes the batch quantities, moves them to to_location for transfers, and logs the
+        # movements in one transaction. Returns the bumped change versions.
+        if movement_type not in ("sale", "transfer"):
+            raise ValueError("Only sales and transfers allocate stock")
+        if movement_type == "transfer" and to_location is None:
+            raise ValueError("A transfer needs a destination location")
+
+        def work():
+            # The picks may not take more than the inventory rows hold, even if batch records say otherwise
+            taken = {}
+            for product_id, _, location_id, quantity in allocations:
+                taken[(product_id, location_id)] = taken.get((product_id, location_id), 0) + quantity
+            for (product_id, location_id), quantity in sorted(taken.items()):
+                self.cursor.execute('SELECT COALESCE(SUM(quantity), 0) FROM inventory WHERE product_id = %s AND location_id = %s FOR UPDATE',
+                                  (product_id, location_id))
+                on_hand = self.cursor.fetchone()[0]
+                if on_hand < quantity:
+                    raise ValueError(f"Only {on_hand} units of product {product_id} at location {location_id}, {quantity} picked")
+            for product_id, batch_id, location_id, quantity in allocations:
+                if batch_id is None:
+                    continue
+                self.cursor.execute('UPDATE batch_stock SET quantity = quantity - %s WHERE batch_id = %s AND location_id = %s AND quantity >= %s',
+                                  (quantity, batch_id, location_id, quantity))
+                if self.cursor.rowcount == 0:
+                    raise ValueError(f"Batch {batch_id} at location {location_id} no longer has {quantity} units")
+                if movement_type == "transfer":
+                    self.cursor.execute('INSERT INTO batch_stock (batch_id, location_id, quantity) VALUES (%s, %s, %s) '
+                                      'ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)',
+                                      (batch_id, to_location, quantity))
+            inventory_ids = self._apply_movements([(product_id, quantity, location_id, to_location, movement_type)
+                                                   for product_id, batch_id, location_id, quantity in allocations])
+            self._finish_write(["batch_stock", "inventory", "stock_movements"], inventory_ids)
+
+        try:
+            self._run_write("record_allocations", work)
+            logging.info(f"Allocations recorded: {len(allocations)} picks, {movement_type}")
+            return self.last_versions
+        except (ValueError, mysql.connector.Error) as e:
+            logging.error(f"Error recording allocations: {e}")
+            raise
+
+    def log_audit(self, inventory_id, action, reason, changed_by):
+        try:
+            timestamp = datetime.now()
+            self.cursor.execute('INSERT INTO audit_logs (inventory_id, action, reason, changed_by, timestamp) VALUES (%s, %s, %s, %s, %s)',
+                              (inventory_id, action, reason, changed_by, timestamp))
+            self._finish_write(["audit_logs"])
+            self._commit()
+            logging.info(f"Audit logged: inventory_id={inventory_id}, action={action}")
+        except mysql.connector.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error logging audit: {e}")
+            raise
+
+    def set_reorder_rule(self, product_id, min_threshold, reorder_point, auto_order_enabled):
+        try:
+            self.cursor.execute('INSERT INTO reorder_rules (product_id, min_threshold, reorder_point, auto_order_enabled) VALUES (%s, %s, %s, %s) '
+                              'ON DUPLICATE KEY UPDATE min_threshold=%s, reorder_point=%s, auto_order_enabled=%s',
+                              (product_id, min_threshold, reorder_point, auto_order_enabled, min_threshold, reorder_point, auto_order_enabled))
+            self._finish_write(["reorder_rules"])
+            self._commit()
+            logging.info(f"Reorder rule set: product_id={product_id}")
+        except mysql.connector.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error setting reorder rule: {e}")
+            raise
+
+    def set_reorder_rules(self, rules, auto_order_enabled=True, batch_size=5000):
+        # rules: (product_id, min_threshold, reorder_point) tuples, upserted in one transaction.
+        # New rules get auto_order_enabled; existing rules keep their setting.
+        try:
+            for start in range(0, len(rules), batch_size):
+                self.cursor.executemany('INSERT INTO reorder_rules (product_id, min_threshold, reorder_point, auto_order_enabled) VALUES (%s, %s, %s, %s) '
+                                      'ON DUPLICATE KEY UPDATE min_threshold = VALUES(min_threshold), reorder_point = VALUES(reorder_point)',
+                                      [(p, m, r, auto_order_enabled) for p, m, r in rules[start:start + batch_size]])
+            self._finish_write(["reorder_rules"])
+            self._commit()
+            logging.info(f"Reorder rules set: {len(rules)} products")
+        except mysql.connector.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error setting reorder rules: {e}")
+            raise
+
+    def get_reorder_rules(self):
+        try:
+            self.cursor.execute('SELECT product_id, min_threshold, reorder_point, auto_order_enabled FROM reorder_rules')
+            return {row[0]: row[1:] for row in self.cursor.fetchall()}
+        except mysql.connector.Error as e:
+            logging.error(f"Error retrieving reorder rules: {e}")
+            return {}
+
+    def check_expiry_alerts(self):
+        return self.get_expiry_alerts_since(0)[1]
+
+    def check_reorder_alerts(self):
+        alerts = []
+        self.cursor.execute(REORDER_ALERTS_SQL)
+        for row in self.cursor.fetchall():
+            alerts.append(row)
+        return alerts
+
+    def create_cycle_count(self, counts, warehouse_id, zone=None, created_by=None):
+        # counts: (product_id, location_id, counted_quantity) tuples for one warehouse, or one zone
+        # of it. Repeated pairs are added up. Stock in scope that was not counted counts as zero.
+        counted = {}
+        for product_id, location_id, quantity in counts:
+            key = (int(product_id), int(location_id))
+            if int(quantity) < 0:
+                raise ValueError(f"Negative count for product {key[0]} at location {key[1]}")
+            counted[key] = counted.get(key, 0) + int(quantity)
+        try:
+            if zone:
+                self.cursor.execute('SELECT location_id FROM locations WHERE warehouse_id = %s AND zone = %s', (warehouse_id, zone))
+            else:
+                self.cursor.execute('SELECT location_id FROM locations WHERE warehouse_id = %s', (warehouse_id,))
+            in_scope = {row[0] for row in self.cursor.fetchall()}
+            outside = sorted({location_id for _, location_id in counted} - in_scope)
+            if outside:
+                raise ValueError(f"Counted locations outside the count scope: {', '.join(map(str, outside[:10]))}")
+            self.cursor.execute('INSERT INTO cycle_counts (warehouse_id, zone, created_by, created_at) VALUES (%s, %s, %s, %s)',
+                              (warehouse_id, zone or None, created_by, datetime.now()))
+            count_id = self.cursor.lastrowid
+            self.cursor.executemany('INSERT INTO cycle_count_lines (count_id, product_id, location_id, counted_quantity) VALUES (%s, %s, %s, %s)',
+                                  [(count_id, p, l, q) for (p, l), q in counted.items()])
+            self.conn.commit()
+            logging.info(f"Cycle count {count_id} created: {len(counted)} lines, warehouse_id={warehouse_id}, zone={zone}")
+            return count_id
+        except (ValueError, mysql.connector.Error) as e:
+            self.conn.rollback()
+            logging.error(f"Error creating cycle count: {e}")
+            raise
+
+    def get_cycle_count_variances(self, count_id):
+        # Returns (inventory_id, product_id, location_id, system_quantity, counted_quantity, variance, version);
+        # inventory_id and version are None for counted stock that has no inventory row yet
+        self.conn.commit()
+        self.cursor.execute(CYCLE_COUNT_VARIANCES_SQL, (count_id, count_id))
+        return [(i, p, l, system, counted, counted - system, version)
+                for i, p, l, system, counted, version in self.cursor.fetchall()]
+
+    def apply_cycle_count(self, count_id, variances, changed_by, reason="Cycle count"):
+        # Applies the reviewed variances and their audit records in one transaction. Rows changed
+        # since the variances were computed fail the version check and nothing is applied.
+        stale = "Inventory changed since the count was compared; reload the variances"
+
+        def work():
+            timestamp = datetime.now()
+            self.cursor.execute('SELECT status FROM cycle_counts WHERE count_id = %s FOR UPDATE', (count_id,))
+            row = self.cursor.fetchone()
+            if not row:
+                raise ValueError(f"Cycle count {count_id} not found")
+            if row[0] != "open":
+                raise ValueError(f"Cycle count {count_id} was already applied")
+            updates = [(counted, inventory_id, version)
+                       for inventory_id, _, _, _, counted, _, version in variances if inventory_id is not None]
+            if updates:
+                self.cursor.executemany('UPDATE inventory SET quantity = %s, version = version + 1 WHERE inventory_id = %s AND version = %s', updates)
+                if self.cursor.rowcount != len(updates):
+                    raise ConcurrentUpdateError(stale, retryable=False)
+            inventory_ids = {}
+            for inventory_id, product_id, location_id, _, counted, _, _ in variances:
+                if inventory_id is None:
+                    try:
+                        self.cursor.execute('INSERT INTO inventory (product_id, location_id, quantity, status) VALUES (%s, %s, %s, %s)',
+                                          (product_id, location_id, counted, "available"))
+                    except mysql.connector.Error as e:
+                        if getattr(e, "errno", None) == 1062:
+                            # Another user created the row meanwhile
+                            raise ConcurrentUpdateError(stale, retryable=False)
+                        raise
+                    inventory_id = self.cursor.lastrowid
+                inventory_ids[(product_id, location_id)] = inventory_id
+            self.cursor.executemany('INSERT INTO audit_logs (inventory_id, action, reason, changed_by, timestamp) VALUES (%s, %s, %s, %s, %s)',
+                                  [(inventory_ids[(p, l)], f"Cycle count {count_id}: {system} -> {counted} ({variance:+d})",
+                                    reason, changed_by, timestamp)
+                                   for _, p, l, system, counted, variance, _ in variances])
+            self.cursor.execute('UPDATE cycle_counts SET status = %s, applied_by = %s, applied_at = %s WHERE count_id = %s',
+                              ("applied", changed_by, timestamp, count_id))
+            trimmed = self._trim_batch_stock([update[1] for update in updates])
+            self._finish_write(["inventory", "audit_logs"] + (["batch_stock"] if trimmed else []), list(inventory_ids.values()))
+
+        try:
+            self._run_write("apply_cycle_count", work)
+            logging.info(f"Cycle count {count_id} applied: {len(variances)} corrections")
+            return len(variances)
+        except (ValueError, mysql.connector.Error) as e:
+            logging.error(f"Error applying cycle count: {e}")
+            raise
+
+    def iter_report(self, name, chunk_size=5000):
+        # Streams a report: yields the column names first, then lists of up to chunk_size rows
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(REPORT_QUERIES[name])
+            yield [col[0] for col in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    def get_inventory_summary(self):
+        try:
+            self.cursor.execute(INVENTORY_SUMMARY_SQL)
+            result = self.cursor.fetchall()
+            logging.info(f"Inventory summary retrieved: {len(result)} records")
+            return result
+        except mysql.connector.Error as e:
+            logging.error(f"Error retrieving inventory summary: {e}")
+            return []
+
+    def get_inventory_page(self, after_inventory_id=0, limit=500):
+        try:
+            self.cursor.execute(INVENTORY_PAGE_SQL + ' WHERE i.inventory_id > %s ORDER BY i.inventory_id LIMIT %s',
+                              (after_inventory_id, limit))
+            return self.cursor.fetchall()
+        except mysql.connector.Error as e:
+            logging.error(f"Error retrieving inventory page: {e}")
+            return []
+
+    @staticmethod
+    def _like_prefix(prefix):
+        return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+    def search_products(self, prefix, limit=20):
+        try:
+            self.cursor.execute('SELECT product_id, name FROM products WHERE name LIKE %s ORDER BY name LIMIT %s',
+                              (self._like_prefix(prefix), limit))
+            return self.cursor.fetchall()
+        except mysql.connector.Error as e:
+            logging.error(f"Error searching products: {e}")
+            return []
+
+    def search_locations(self, prefix, limit=20):
+        try:
+            pattern = self._like_prefix(prefix)
+            self.cursor.execute('''
+                SELECT l.location_id, w.name, l.zone, l.aisle, l.bin
+                FROM locations l
+                JOIN warehouses w ON l.warehouse_id = w.warehouse_id
+                WHERE w.name LIKE %s OR l.zone LIKE %s OR l.bin LIKE %s
+                ORDER BY w.name, l.zone, l.aisle, l.bin
+                LIMIT %s
+            ''', (pattern, pattern, pattern, limit))
+            return self.cursor.fetchall()
+        except mysql.connector.Error as e:
+            logging.error(f"Error searching locations: {e}")
+            return []
+
+    def get_product(self, product_id):
+        self.cursor.execute('SELECT product_id, name, description, category FROM products WHERE product_id = %s', (product_id,))
+        product = self.cursor.fetchone()
+        if not product:
+            return None, []
+        self.cursor.execute('SELECT inventory_id, location_id, quantity, status FROM inventory WHERE product_id = %s', (product_id,))
+        return product, self.cursor.fetchall()
+
+    def get_location(self, location_id):
+        self.cursor.execute('''
+            SELECT l.location_id, l.warehouse_id, w.name, l.zone, l.aisle, l.bin
+            FROM locations l
+            JOIN warehouses w ON l.warehouse_id = w.warehouse_id
+            WHERE l.location_id = %s
+        ''', (location_id,))
+        location = self.cursor.fetchone()
+        if not location:
+            return None, []
+        self.cursor.execute('SELECT inventory_id, product_id, quantity, status FROM inventory WHERE location_id = %s', (location_id,))
+        return location, self.cursor.fetchall()
+
+    def get_warehouses(self):
+        try:
+            self.cursor.execute('SELECT warehouse_id, name, location FROM warehouses')
+            return self.cursor.fetchall()
+        except mysql.connector.Error as e:
+            logging.error(f"Error retrieving warehouses: {e}")
+            return []
+
+    def get_locations(self, after_location_id=0):
+        # Locations are only ever added, so after_location_id returns just the newer ones
+        try:
+            self.cursor.execute('''
+                SELECT l.location_id, w.name, l.zone, l.aisle, l.bin
+                FROM locations l
+                JOIN warehouses w ON l.warehouse_id = w.warehouse_id
+                WHERE l.location_id > %s
+            ''', (after_location_id,))
+            return self.cursor.fetchall()
+        except mysql.connector.Error as e:
+            logging.error(f"Error retrieving locations: {e}")
+            return []
+
+    def get_products(self, after_product_id=0):
+        try:
+            self.cursor.execute('SELECT product_id, name FROM products WHERE product_id > %s', (after_product_id,))
+            return self.cursor.fetchall()
+        except mysql.connector.Error as e:
+            logging.error(f"Error retrieving products: {e}")
+            return []
+
+    def authenticate_user(self, username, password):
+        try:
+            self.cursor.execute('SELECT role FROM users WHERE username = %s AND password = %s', (username, password))
+            result = self.cursor.fetchone()
+            return result[0] if result else None
+        except mysql.connector.Error as e:
+            logging.error(f"Error authenticating user: {e}")
+            return None
+
+    def close(self):
+        self.conn.close()
+        logging.info("Database connection closed")
+
+# Fixed-size pool of DatabaseManager connections for work running on several threads
+class ConnectionPool:
+    def __init__(self, size=4, **connection_args):
+        self.size = size
+        self.connection_args = connection_args
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._schema_checked = False
+
+    def acquire(self, timeout=None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    db = DatabaseManager(**self.connection_args, ensure_schema=not self._schema_checked)
+                except mysql.connector.Error:
+                    self._created -= 1
+                    raise
+                # Only once a connection got through does the schema count as checked
+                self._schema_checked = True
+                return db
+        return self._idle.get(timeout=timeout)
+
+    def release(self, db):
+        try:
+            db.conn.rollback()
+        except mysql.connector.Error as e:
+            # Drop broken connections so a fresh one is opened next time
+            logging.error(f"Discarding pooled connection: {e}")
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(db)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        db = self.acquire(timeout)
+        try:
+            yield db
+        finally:
+            self.release(db)
+
+    def close(self):
+        while True:
+            try:
+                db = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            db.close()
+            with self._lock:
+                self._created -= 1
+
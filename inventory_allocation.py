@@ -0,0 +1,184 @@
+import heapq
+import logging
+from datetime import date
+
+# Stock that can be picked: batch quantities at locations whose inventory row is available, plus
+# the part of each available inventory row not covered by any batch (picked after every batch, as
+# it has no expiry). The last column is the inventory quantity at the location, which caps the
+# batch picks there.
+ALLOCATABLE_STOCK_SQL = '''
+    SELECT sb.product_id, bs.batch_id, bs.location_id, bs.quantity, sb.expiry_date, sb.received_date, i.quantity
+    FROM batch_stock bs
+    JOIN serial_batches sb ON sb.id = bs.batch_id
+    JOIN inventory i ON i.product_id = sb.product_id AND i.location_id = bs.location_id
+    WHERE i.status = 'available' AND bs.quantity > 0 {batch_filter}
+    UNION ALL
+    SELECT i.product_id, NULL, i.location_id, i.quantity - COALESCE(b.quantity, 0), NULL, NULL, i.quantity
+    FROM inventory i
+    LEFT JOIN (
+        SELECT sb.product_id, bs.location_id, SUM(bs.quantity) AS quantity
+        FROM batch_stock bs
+        JOIN serial_batches sb ON sb.id = bs.batch_id
+        GROUP BY sb.product_id, bs.location_id
+    ) b ON b.product_id = i.product_id AND b.location_id = i.location_id
+    WHERE i.status = 'available' AND i.quantity > COALESCE(b.quantity, 0) {inventory_filter}
+'''
+
+# Tables whose writes change allocatable stock. Every batch_stock write also changes inventory at
+# the same product and location, so the changed inventory rows say which stock to re-read.
+ALLOCATION_TABLES = ("inventory", "batch_stock")
+
+# Earliest-expiry-first picker. Every (product, batch, location) stock entry sits in two heaps:
+# one per product and one per (product, location), ordered by expiry then received date.
+# Quantities live in one dict shared by both heaps; entries that run out are dropped lazily
+# when they reach the top.
+class StockAllocator:
+    def __init__(self):
+        self.available = {}
+        self.order_keys = {}
+        self.queues = {}
+        self.keys_at = {}
+        self.on_hand = {}
+        self.versions = {}
+
+    @classmethod
+    def load(cls, db, chunk_size=100000):
+        # The change versions are read in the same snapshot as the stock
+        allocator = cls()
+        versions = db.get_change_versions()
+        allocator.versions = {table: versions.get(table) for table in ALLOCATION_TABLES}
+        for product_id, batch_id, location_id, quantity, expiry_date, received_date, on_hand in allocator._read_stock(
+                db, ALLOCATABLE_STOCK_SQL.format(batch_filter="", inventory_filter=""), (), chunk_size):
+            allocator.on_hand[(product_id, location_id)] = int(on_hand)
+            allocator.add_stock(product_id, batch_id, location_id, int(quantity), expiry_date, received_date)
+        logging.info(f"Allocator loaded: {len(allocator.available)} stock entries")
+        return allocator
+
+    def refresh(self, db, pairs_per_query=500):
+        # Returns the allocator to use from now on: this one with the stock at every changed
+        # (product, location) re-read, or a full reload if this one never knew its version
+        versions = db.get_change_versions()
+        if all(versions.get(table) == self.versions.get(table) for table in ALLOCATION_TABLES):
+            return self
+        if self.versions.get("inventory") is None:
+            return StockAllocator.load(db)
+        rows = db.get_inventory_rows_since(self.versions["inventory"])
+        pairs = sorted({(product_id, location_id) for _, product_id, location_id, _ in rows})
+        fresh = {}
+        for _, product_id, location_id, quantity in rows:
+            self.on_hand[(product_id, location_id)] = quantity or 0
+        for start in range(0, len(pairs), pairs_per_query):
+            chunk = pairs[start:start + pairs_per_query]
+            condition = "(" + ", ".join(["(%s, %s)"] * len(chunk)) + ")"
+            params = [part for pair in chunk for part in pair]
+            sql = ALLOCATABLE_STOCK_SQL.format(batch_filter=f"AND (sb.product_id, bs.location_id) IN {condition}",
+                                               inventory_filter=f"AND (i.product_id, i.location_id) IN {condition}")
+            for product_id, batch_id, location_id, quantity, expiry_date, received_date, _ in self._read_stock(db, sql, params * 2):
+                fresh[(product_id, batch_id, location_id)] = (int(quantity), expiry_date, received_date)
+        for pair in pairs:
+            for key in self.keys_at.get(pair, ()):
+                if key not in fresh:
+                    self.available[key] = 0
+        for key, (quantity, expiry_date, received_date) in fresh.items():
+            if self.available.get(key, 0) > 0:
+                # Still queued; only the quantity changes
+                self.available[key] = quantity
+            else:
+                self.add_stock(*key, quantity, expiry_date, received_date)
+        self.versions = {table: versions.get(table) for table in ALLOCATION_TABLES}
+        logging.debug(f"Allocator refreshed: {len(pairs)} changed locations")
+        return self
+
+    @staticmethod
+    def _read_stock(db, sql, params, chunk_size=100000):
+        cursor = db.conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def advance(self, bumped):
+        # Follows our own write only if nobody else wrote in between; otherwise the old versions are
+        # kept so the next refresh re-reads everything changed since
+        for table in ALLOCATION_TABLES:
+            current = self.versions.get(table)
+            if table in bumped and current is not None and bumped[table] == current + 1:
+                self.versions[table] = bumped[table]
+
+    def add_stock(self, product_id, batch_id, location_id, quantity, expiry_date=None, received_date=None):
+        key = (product_id, batch_id, location_id)
+        if key not in self.order_keys:
+            self.order_keys[key] = (expiry_date or date.max, received_date or date.max, batch_id is None, batch_id or 0, location_id)
+            self.keys_at.setdefault((product_id, location_id), set()).add(key)
+        before = self.available.get(key, 0)
+        self.available[key] = before + quantity
+        if before <= 0 < self.available[key]:
+            entry = self.order_keys[key] + (key,)
+            heapq.heappush(self.queues.setdefault((product_id, None), []), entry)
+            heapq.heappush(self.queues.setdefault((product_id, location_id), []), entry)
+
+    def _take(self, product_id, location_id, quantity, as_of):
+        queue = self.queues.get((product_id, location_id), [])
+        picks = []
+        capped = []
+        while quantity and queue:
+            entry = queue[0]
+            key = entry[-1]
+            available = self.available.get(key, 0)
+            if available <= 0 or entry[0] < as_of:
+                # Used up or expired
+                heapq.heappop(queue)
+                continue
+            # Batch records never yield more than the inventory actually at the location
+            on_hand = self.on_hand.get((key[0], key[2]), 0)
+            if on_hand <= 0:
+                capped.append(heapq.heappop(queue))
+                continue
+            taken = min(quantity, available, on_hand)
+            self.available[key] = available - taken
+            self.on_hand[(key[0], key[2])] = on_hand - taken
+            if taken == available:
+                heapq.heappop(queue)
+            picks.append((key[0], key[1], key[2], taken))
+            quantity -= taken
+        for entry in capped:
+            heapq.heappush(queue, entry)
+        return picks, quantity
+
+    def allocate(self, lines, as_of=None):
+        # lines: (product_id, quantity, location_id or None) order lines, handled in one pass.
+        # Returns (product_id, batch_id, location_id, quantity) picks. Either every line is
+        # filled or nothing is taken and ValueError lists the shortages. Batches expiring before
+        # as_of (today when the call is made, by default) are skipped.
+        as_of = as_of or date.today()
+        if any(quantity <= 0 for _, quantity, _ in lines):
+            raise ValueError("Quantity must be positive")
+        allocations = []
+        shortages = []
+        for product_id, quantity, location_id in lines:
+            picks, missing = self._take(product_id, location_id, quantity, as_of)
+            allocations.extend(picks)
+            if missing:
+                shortages.append(f"product {product_id}" + (f" at location {location_id}" if location_id is not None else "")
+                                 + f": short {missing}")
+        if shortages:
+            self.release(allocations)
+            raise ValueError("Insufficient stock for " + "; ".join(shortages))
+        return allocations
+
+    def release(self, allocations):
+        # Puts picks back, e.g. when writing them to the database failed
+        for product_id, batch_id, location_id, quantity in allocations:
+            self.on_hand[(product_id, location_id)] = self.on_hand.get((product_id, location_id), 0) + quantity
+            self.add_stock(product_id, batch_id, location_id, quantity)
+
+    def receive(self, allocations, to_location):
+        # Mirrors a committed transfer: the picked batches are now stocked at to_location
+        for product_id, batch_id, location_id, quantity in allocations:
+            self.on_hand[(product_id, to_location)] = self.on_hand.get((product_id, to_location), 0) + quantity
+            self.add_stock(product_id, batch_id, to_location, quantity, *self.order_keys[(product_id, batch_id, location_id)][:2])
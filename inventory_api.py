@@ -0,0 +1,416 @@
+# Optional local HTTP/JSON service for scanners and integrations.
+# Built on asyncio; database calls are offloaded to a thread pool, each worker using its
+# own pooled DatabaseManager connection, and the number of in-flight calls is bounded.
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import mysql.connector
+
+from database_manager import ConcurrentUpdateError, ConnectionPool, INVENTORY_STATUSES, MOVEMENT_TYPES, WRITE_METRICS
+from inventory_cli import add_connection_arguments, connection_args
+from inventory_locations import LEVELS, LocationHierarchy
+
+MAX_BODY_BYTES = 1024 * 1024
+# Rollup requests check the change versions at most this often (seconds)
+HIERARCHY_REFRESH_INTERVAL = 1.0
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_movement(data):
+    try:
+        movement = (
+            int(data["product_id"]),
+            int(data["quantity"]),
+            int(data["from_location"]) if data.get("from_location") is not None else None,
+            int(data["to_location"]) if data.get("to_location") is not None else None,
+            data["movement_type"],
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPError(400, f"Invalid movement: {e}")
+    if movement[1] < 0:
+        raise HTTPError(400, "Quantity cannot be negative")
+    if movement[4] not in MOVEMENT_TYPES:
+        raise HTTPError(400, f"movement_type must be one of {', '.join(MOVEMENT_TYPES)}")
+    # Without a location the quantity would apply to every inventory row of the product
+    if movement[4] in ("sale", "transfer") and movement[2] is None:
+        raise HTTPError(400, f"A {movement[4]} needs from_location")
+    if movement[4] in ("restock", "transfer", "return") and movement[3] is None:
+        raise HTTPError(400, f"A {movement[4]} needs to_location")
+    return movement
+
+
+# Coalesces movements posted by concurrent requests into one record_movements transaction
+class MovementBatcher:
+    def __init__(self, service, max_batch=200, window=0.005):
+        self.service = service
+        self.max_batch = max_batch
+        self.window = window
+        self.pending = []
+        self._timer = None
+
+    async def submit(self, movement):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((movement, future))
+        if len(self.pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        return await future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            asyncio.ensure_future(self._write(batch))
+
+    async def _write(self, batch):
+        movements = [movement for movement, _ in batch]
+        try:
+            await self.service.run_db(lambda db: db.record_movements(movements))
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # One bad line fails the whole transaction; retry individually to isolate it
+            await asyncio.gather(*(self._write([item]) for item in batch))
+            return
+        for _, future in batch:
+            if not future.done():
+                future.set_result(len(batch))
+
+
+class InventoryService:
+    def __init__(self, pool, max_concurrency=16):
+        self.pool = pool
+        self.executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="ims-db")
+        self.limit = asyncio.Semaphore(max_concurrency)
+        self.batcher = MovementBatcher(self)
+        self.hierarchy = None
+        self.hierarchy_checked = 0.0
+        self.hierarchy_lock = threading.Lock()
+        self.routes = [
+            ("GET", re.compile(r"^/health$"), self.health),
+            ("GET", re.compile(r"^/metrics$"), self.metrics),
+            ("GET", re.compile(r"^/products$"), self.search_products),
+            ("GET", re.compile(r"^/products/(\d+)$"), self.get_product),
+            ("GET", re.compile(r"^/locations$"), self.search_locations),
+            ("GET", re.compile(r"^/locations/(\d+)$"), self.get_location),
+            ("POST", re.compile(r"^/inventory$"), self.add_inventory),
+            ("GET", re.compile(r"^/inventory/summary$"), self.inventory_summary),
+            ("POST", re.compile(r"^/movements$"), self.add_movements),
+            ("GET", re.compile(r"^/alerts$"), self.alerts),
+            ("GET", re.compile(r"^/rollups$"), self.rollup),
+            ("GET", re.compile(r"^/rollups/by-name$"), self.rollup_by_name),
+            ("GET", re.compile(r"^/rollups/empty$"), self.empty_locations),
+            ("POST", re.compile(r"^/batch$"), self.batch),
+        ]
+
+    def _run_job(self, job):
+        with self.pool.connection() as db:
+            return job(db)
+
+    async def run_db(self, job):
+        async with self.limit:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self._run_job, job)
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        # Blank values are kept: /rollups uses zone= to address a NULL zone
+        query = {key: values[-1] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            allowed = True
+            if route_method == method:
+                try:
+                    data = json.loads(body) if body else None
+                except ValueError:
+                    return 400, {"error": "Body is not valid JSON"}
+                try:
+                    return await handler(query, data, *match.groups())
+                except HTTPError as e:
+                    return e.status, {"error": str(e)}
+                except ValueError as e:
+                    return 400, {"error": str(e)}
+                except ConcurrentUpdateError as e:
+                    return 409, {"error": str(e)}
+                except mysql.connector.Error as e:
+                    logging.error(f"API database error on {method} {url.path}: {e}")
+                    return 500, {"error": str(e)}
+                except Exception as e:
+                    logging.exception(f"API error on {method} {url.path}")
+                    return 500, {"error": str(e)}
+        return (405, {"error": "Method not allowed"}) if allowed else (404, {"error": "Not found"})
+
+    @staticmethod
+    def _limit(query, default=20, maximum=1000):
+        try:
+            return max(1, min(int(query.get("limit") or default), maximum))
+        except ValueError:
+            raise HTTPError(400, "limit must be an integer")
+
+    async def health(self, query, data):
+        return 200, {"ok": True}
+
+    async def metrics(self, query, data):
+        return 200, {"writes": WRITE_METRICS.snapshot()}
+
+    async def search_products(self, query, data):
+        prefix, limit = query.get("q", ""), self._limit(query)
+        rows = await self.run_db(lambda db: db.search_products(prefix, limit))
+        return 200, [{"product_id": p, "name": n} for p, n in rows]
+
+    async def get_product(self, query, data, product_id):
+        product, inventory = await self.run_db(lambda db: db.get_product(int(product_id)))
+        if not product:
+            raise HTTPError(404, "Product not found")
+        return 200, {
+            "product_id": product[0], "name": product[1], "description": product[2], "category": product[3],
+            "inventory": [{"inventory_id": i, "location_id": l, "quantity": q, "status": s} for i, l, q, s in inventory],
+        }
+
+    async def search_locations(self, query, data):
+        prefix, limit = query.get("q", ""), self._limit(query)
+        rows = await self.run_db(lambda db: db.search_locations(prefix, limit))
+        return 200, [{"location_id": l, "warehouse": w, "zone": z, "aisle": a, "bin": b} for l, w, z, a, b in rows]
+
+    async def get_location(self, query, data, location_id):
+        location, inventory = await self.run_db(lambda db: db.get_location(int(location_id)))
+        if not location:
+            raise HTTPError(404, "Location not found")
+        return 200, {
+            "location_id": location[0], "warehouse_id": location[1], "warehouse": location[2],
+            "zone": location[3], "aisle": location[4], "bin": location[5],
+            "inventory": [{"inventory_id": i, "product_id": p, "quantity": q, "status": s} for i, p, q, s in inventory],
+        }
+
+    async def add_inventory(self, query, data):
+        try:
+            product_id, location_id, quantity = int(data["product_id"]), int(data["location_id"]), int(data["quantity"])
+            status = data.get("status", "available")
+        except (KeyError, TypeError, ValueError) as e:
+            raise HTTPError(400, f"Invalid inventory record: {e}")
+        if quantity < 0:
+            raise HTTPError(400, "Quantity cannot be negative")
+        if status not in INVENTORY_STATUSES:
+            raise HTTPError(400, f"status must be one of {', '.join(INVENTORY_STATUSES)}")
+        await self.run_db(lambda db: db.add_inventory(product_id, location_id, quantity, status))
+        return 201, {"ok": True}
+
+    async def inventory_summary(self, query, data):
+        try:
+            after = int(query.get("after") or 0)
+        except ValueError:
+            raise HTTPError(400, "after must be an integer")
+        limit = self._limit(query, default=500, maximum=5000)
+        rows = await self.run_db(lambda db: db.get_inventory_page(after, limit))
+        columns = ("inventory_id", "product_id", "product", "quantity", "status", "warehouse", "zone", "aisle", "bin", "location_id")
+        return 200, {
+            "items": [dict(zip(columns, row)) for row in rows],
+            "next_after": rows[-1][0] if len(rows) == limit else None,
+        }
+
+    async def add_movements(self, query, data):
+        # Accepts one movement object or a list; concurrent requests share a transaction
+        movements = [parse_movement(item) for item in (data if isinstance(data, list) else [data])]
+        if not movements:
+            raise HTTPError(400, "No movements given")
+        if len(movements) == 1:
+            await self.batcher.submit(movements[0])
+        else:
+            await self.run_db(lambda db: db.record_movements(movements))
+        return 201, {"recorded": len(movements)}
+
+    async def alerts(self, query, data):
+        kind = query.get("kind") or "all"
+        if kind not in ("expiry", "reorder", "all"):
+            raise HTTPError(400, "kind must be expiry, reorder or all")
+        result = {}
+        if kind in ("expiry", "all"):
+            rows = await self.run_db(lambda db: db.check_expiry_alerts())
+            result["expiry"] = [{"product_id": p, "batch_number": b, "days_to_expiry": d} for p, b, d in rows]
+        if kind in ("reorder", "all"):
+            rows = await self.run_db(lambda db: db.check_reorder_alerts())
+            result["reorder"] = [{"product_id": p, "quantity": q, "min_threshold": m, "reorder_point": r} for p, q, m, r in rows]
+        return 200, result
+
+    def _hierarchy(self, db):
+        # Loaded on first use; afterwards inventory changes are applied incrementally
+        with self.hierarchy_lock:
+            if self.hierarchy is None:
+                self.hierarchy = LocationHierarchy.load(db)
+            elif time.monotonic() - self.hierarchy_checked >= HIERARCHY_REFRESH_INTERVAL:
+                self.hierarchy = self.hierarchy.refresh(db)
+            self.hierarchy_checked = time.monotonic()
+            return self.hierarchy
+
+    async def query_hierarchy(self, job):
+        def run(db):
+            hierarchy = self._hierarchy(db)
+            with hierarchy.lock:
+                return job(hierarchy)
+        return await self.run_db(run)
+
+    @staticmethod
+    def _int_param(query, name):
+        try:
+            return int(query[name]) if query.get(name) else None
+        except ValueError:
+            raise HTTPError(400, f"{name} must be an integer")
+
+    async def rollup(self, query, data):
+        # One node (or all warehouses) with its quantity and its children's quantities. zone and
+        # aisle address the path positionally; a blank value means a NULL zone or aisle.
+        warehouse_id, location_id = self._int_param(query, "warehouse_id"), self._int_param(query, "location_id")
+        product_id = self._int_param(query, "product_id")
+        if "aisle" in query and "zone" not in query:
+            raise HTTPError(400, "aisle needs zone")
+        if ("zone" in query or "aisle" in query) and warehouse_id is None and location_id is None:
+            raise HTTPError(400, "zone and aisle need warehouse_id")
+        path = tuple(query[part] or None for part in ("zone", "aisle") if part in query)
+
+        def job(hierarchy):
+            if warehouse_id is None and location_id is None:
+                nodes, node = hierarchy.warehouses(), None
+            else:
+                node = hierarchy.node(warehouse_id, path, location_id)
+                if node is None:
+                    raise HTTPError(404, "Location not found")
+                nodes = node.sorted_children()
+            return {
+                "path": node.path() if node else [],
+                "level": node.level if node else None,
+                "quantity": node.quantity(product_id) if node else sum(n.quantity(product_id) for n in nodes),
+                "products": len(node.products) if node else None,
+                "children": [{"name": child.name, "level": child.level, "quantity": child.quantity(product_id),
+                              "location_id": child.key[-1] if child.level == "bin" else None} for child in nodes],
+            }
+
+        return 200, await self.query_hierarchy(job)
+
+    async def rollup_by_name(self, query, data):
+        # e.g. /rollups/by-name?level=zone&name=Zone A&product_id=5: quantity across every warehouse
+        level, name = query.get("level") or "zone", query.get("name")
+        if level not in ("zone", "aisle") or not name:
+            raise HTTPError(400, "level must be zone or aisle and name is required")
+        product_id = self._int_param(query, "product_id")
+        quantity = await self.query_hierarchy(lambda hierarchy: hierarchy.quantity_by_name(level, name, product_id))
+        return 200, {"level": level, "name": name, "product_id": product_id, "quantity": quantity}
+
+    async def empty_locations(self, query, data):
+        level = query.get("level") or "aisle"
+        if level not in LEVELS:
+            raise HTTPError(400, f"level must be one of {', '.join(LEVELS)}")
+        warehouse_id = self._int_param(query, "warehouse_id")
+        nodes = await self.query_hierarchy(lambda hierarchy: [
+            {"path": node.path(), "location_id": node.key[-1] if level == "bin" else None}
+            for node in hierarchy.empty_nodes(level, warehouse_id)
+        ])
+        return 200, {"level": level, "count": len(nodes), "items": nodes}
+
+    async def batch(self, query, data):
+        # Several requests in one round trip: [{"method": "GET", "path": "/products/1", "body": {...}}, ...]
+        if not isinstance(data, list):
+            raise HTTPError(400, "Batch body must be a list of requests")
+        try:
+            requests = [(item.get("method", "GET").upper(), item["path"],
+                         json.dumps(item["body"]) if item.get("body") is not None else b"") for item in data]
+        except (AttributeError, KeyError) as e:
+            raise HTTPError(400, f"Invalid batch request: {e}")
+        if any(path.startswith("/batch") for _, path, _ in requests):
+            raise HTTPError(400, "Batches cannot be nested")
+        results = await asyncio.gather(*(self.dispatch(method, path, body) for method, path, body in requests))
+        return 200, [{"status": status, "body": payload} for status, payload in results]
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    status, payload, keep_alive = 413, {"error": "Body too large"}, False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(method, target, body)
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+                content = json.dumps(payload, default=str).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(content)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + content
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            logging.debug(f"API connection closed: {e}")
+        finally:
+            writer.close()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.pool.close()
+
+
+async def serve(args):
+    pool = ConnectionPool(size=args.pool_size, **connection_args(args))
+    service = InventoryService(pool, max_concurrency=args.max_concurrency)
+    server = await asyncio.start_server(service.handle_connection, args.bind, args.port)
+    logging.info(f"Inventory API listening on http://{args.bind}:{args.port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="inventory_api", description="Local JSON API for the inventory database")
+    add_connection_arguments(parser)
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pool-size", type=int, default=8, help="database connections / worker threads")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="database calls in flight at once")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+# Headless command-line entry point for batch jobs.
+# Uses DatabaseManager directly (no tkinter/ttkbootstrap), prints one JSON document
+# per run on stdout and reports the outcome through the exit code.
+import argparse
+import csv
+import json
+import logging
+import os
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+
+from database_manager import ConnectionPool, REPORT_QUERIES
+from inventory_allocation import StockAllocator
+from inventory_export import export_bundle, export_report
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+# Success, but alerts or variances need attention (--fail-on-alerts / --fail-on-variance)
+EXIT_ATTENTION = 3
+
+
+def run_parallel(pool, jobs):
+    # jobs: {name: callable(db)}; each job runs on its own pooled connection
+    def run(job):
+        with pool.connection() as db:
+            return job(db)
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        futures = {name: executor.submit(run, job) for name, job in jobs.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def cmd_export(pool, args):
+    names = list(REPORT_QUERIES) if "all" in args.reports else args.reports
+    unknown = [name for name in names if name not in REPORT_QUERIES]
+    if unknown:
+        raise ValueError(f"Unknown report(s): {', '.join(unknown)}")
+    os.makedirs(args.output_dir, exist_ok=True)
+    results = run_parallel(pool, {
+        name: (lambda db, name=name: export_report(db, name, os.path.join(args.output_dir, f"{name}.csv")))
+        for name in names
+    })
+    return {"reports": [results[name] for name in names]}, EXIT_OK
+
+
+def cmd_bundle(pool, args):
+    names = list(REPORT_QUERIES) if "all" in args.reports else args.reports
+    return export_bundle(pool, names, args.output), EXIT_OK
+
+
+def cmd_alerts(pool, args):
+    kinds = ["expiry", "reorder"] if args.kind == "all" else [args.kind]
+    checks = {
+        "expiry": lambda db: [
+            {"product_id": p, "batch_number": b, "days_to_expiry": d} for p, b, d in db.check_expiry_alerts()
+        ],
+        "reorder": lambda db: [
+            {"product_id": p, "quantity": q, "min_threshold": m, "reorder_point": r} for p, q, m, r in db.check_reorder_alerts()
+        ],
+    }
+    results = run_parallel(pool, {kind: checks[kind] for kind in kinds})
+    needs_attention = any(results.values())
+    return {"alerts": results}, EXIT_ATTENTION if needs_attention and args.fail_on_alerts else EXIT_OK
+
+
+def read_csv_rows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def cmd_import(pool, args):
+    rows = read_csv_rows(args.file)
+    with pool.connection() as db:
+        result = db.import_inventory(rows)
+    return result, EXIT_OK
+
+
+def cmd_cycle_count(pool, args):
+    # Stores the count, compares it with inventory in one query and optionally applies the corrections
+    counts = [(row["product_id"], row["location_id"], row["counted_quantity"]) for row in read_csv_rows(args.file)]
+    with pool.connection() as db:
+        count_id = db.create_cycle_count(counts, args.warehouse_id, args.zone, args.changed_by)
+        variances = db.get_cycle_count_variances(count_id)
+        if args.apply:
+            db.apply_cycle_count(count_id, variances, args.changed_by, args.reason)
+    result = {
+        "count_id": count_id,
+        "counted": len(counts),
+        "applied": args.apply,
+        "variances": [
+            {"inventory_id": i, "product_id": p, "location_id": l, "system_quantity": s, "counted_quantity": c, "variance": v}
+            for i, p, l, s, c, v, _ in variances
+        ],
+    }
+    return result, EXIT_ATTENTION if variances and args.fail_on_variance else EXIT_OK
+
+
+def cmd_allocate(pool, args):
+    # All order lines are allocated earliest-expiry first in one pass and written in one transaction
+    lines = [(int(row["product_id"]), int(row["quantity"]), int(row["location_id"]) if row.get("location_id") else None)
+             for row in read_csv_rows(args.file)]
+    with pool.connection() as db:
+        allocations = StockAllocator.load(db).allocate(lines)
+        if not args.dry_run:
+            db.record_allocations(allocations, args.movement_type, args.to_location)
+    return {
+        "lines": len(lines),
+        "recorded": not args.dry_run,
+        "allocations": [
+            {"product_id": p, "batch_id": b, "location_id": l, "quantity": q} for p, b, l, q in allocations
+        ],
+    }, EXIT_OK
+
+
+def generate_data(db, warehouses, locations_per_warehouse, products, movements, batches, seed=None):
+    # Bulk-inserts synthetic demo data for load and forecast testing; one commit at the end.
+    # The run tag in warehouse sites and product descriptions tells this run's rows apart from
+    # earlier runs, so their ids can be read back by name.
+    rng = random.Random(seed)
+    run = f"{datetime.now():%Y%m%d%H%M%S%f}"
+    try:
+        warehouse_ids = db.bulk_insert("warehouses", ("name", "location"),
+                                       [(f"Warehouse {n}", f"Site {n} (run {run})") for n in range(1, warehouses + 1)],
+                                       "warehouse_id", ("name", "location"))
+        location_rows = []
+        for warehouse_id in warehouse_ids.values():
+            for n in range(locations_per_warehouse):
+                location_rows.append((warehouse_id, f"Zone {chr(65 + n // 400 % 26)}", f"Aisle {n // 20 % 20 + 1}", f"Bin {n % 20 + 1}"))
+        new_location_ids = db.bulk_insert("locations", ("warehouse_id", "zone", "aisle", "bin"), location_rows,
+                                          "location_id", ("warehouse_id", "zone", "aisle", "bin"))
+        categories = ["Electronics", "Grocery", "Apparel", "Hardware", "Pharmacy", "Toys"]
+        product_ids = list(db.bulk_insert("products", ("name", "description", "category"),
+                                          [(f"Product {n:06d}", f"Generated product {n} (run {run})", rng.choice(categories))
+                                           for n in range(1, products + 1)],
+                                          "product_id", ("name", "description")).values())
+        # Stock and movements may use any location, including ones from earlier runs
+        location_ids = [location[0] for location in db.get_locations()] or list(new_location_ids.values())
+
+        inventory_rows = set()
+        for product_id in product_ids:
+            for location_id in rng.sample(location_ids, min(len(location_ids), rng.randint(1, 3))):
+                inventory_rows.add((product_id, location_id))
+        inventory_ids = db.bulk_insert("inventory", ("product_id", "location_id", "quantity", "status"),
+                                       [(p, l, rng.randint(0, 500), rng.choice(["available"] * 8 + ["reserved", "in-transit", "damaged"]))
+                                        for p, l in sorted(inventory_rows)],
+                                       "inventory_id", ("product_id", "location_id"))
+
+        now = datetime.now()
+        movement_types = ["sale"] * 6 + ["restock"] * 2 + ["transfer", "return"]
+        for start in range(0, movements, 10000):
+            chunk = []
+            for _ in range(start, min(start + 10000, movements)):
+                movement_type = rng.choice(movement_types)
+                chunk.append((rng.choice(product_ids), rng.randint(1, 20),
+                              rng.choice(location_ids) if movement_type in ("sale", "transfer") else None,
+                              rng.choice(location_ids) if movement_type in ("restock", "transfer", "return") else None,
+                              movement_type, now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))))
+            db.bulk_insert("stock_movements", ("product_id", "quantity", "from_location", "to_location", "movement_type", "timestamp"),
+                           chunk)
+
+        today = date.today()
+        db.bulk_insert("serial_batches", ("product_id", "serial_or_batch_number", "type", "expiry_date", "received_date"),
+                       [(rng.choice(product_ids), f"BATCH-{n:07d}", "batch",
+                         today + timedelta(days=rng.randint(-30, 365)), today - timedelta(days=rng.randint(0, 180)))
+                        for n in range(1, batches + 1)])
+        db.commit_changes(["warehouses", "locations", "products", "inventory", "stock_movements", "serial_batches"],
+                          list(inventory_ids.values()))
+    except mysql.connector.Error:
+        db.conn.rollback()
+        raise
+    logging.info("Synthetic data generated")
+    return {
+        "warehouses": warehouses,
+        "locations": len(location_rows),
+        "products": products,
+        "inventory": len(inventory_rows),
+        "movements": movements,
+        "batches": batches,
+    }
+
+
+def cmd_generate(pool, args):
+    with pool.connection() as db:
+        result = generate_data(db, args.warehouses, args.locations_per_warehouse, args.products,
+                               args.movements, args.batches, args.seed)
+    return result, EXIT_OK
+
+
+def add_connection_arguments(parser):
+    parser.add_argument("--host", default=os.environ.get("IMS_DB_HOST", "127.0.0.1"))
+    parser.add_argument("--user", default=os.environ.get("IMS_DB_USER", "root"))
+    parser.add_argument("--password", default=os.environ.get("IMS_DB_PASSWORD", ""))
+    parser.add_argument("--database", default=os.environ.get("IMS_DB_NAME", "inventory_db"))
+
+
+def connection_args(args):
+    return {"host": args.host, "user": args.user, "password": args.password, "database": args.database}
+
+
+def cmd_forecast(pool, args):
+    from inventory_forecast import compute_reorder_suggestions
+    with pool.connection() as db:
+        suggestions = compute_reorder_suggestions(db, args.history_days, args.lead_time, args.service_level).with_demand()
+        if args.apply:
+            db.set_reorder_rules(suggestions.rules())
+    return {
+        "products": len(suggestions),
+        "applied": args.apply,
+        "rules": [
+            {"product_id": p, "min_threshold": m, "reorder_point": r, "safety_stock": s}
+            for (p, m, r), s in zip(suggestions.rules(), suggestions.safety_stock.tolist())
+        ] if args.show_rules else None,
+    }, EXIT_OK
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="inventory_cli", description="Inventory Management System batch jobs")
+    add_connection_arguments(parser)
+    parser.add_argument("--jobs", type=int, default=4, help="parallel connections for independent jobs")
+    parser.add_argument("--verbose", action="store_true", help="log progress to stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="export reports to CSV")
+    export.add_argument("reports", nargs="+", help=f"report names or 'all' ({', '.join(REPORT_QUERIES)})")
+    export.add_argument("--output-dir", default=".")
+    export.set_defaults(handler=cmd_export)
+
+    bundle = commands.add_parser("bundle", help="export reports in parallel into one zip archive with a manifest")
+    bundle.add_argument("reports", nargs="+", help=f"report names or 'all' ({', '.join(REPORT_QUERIES)})")
+    bundle.add_argument("--output", default=f"reports_{datetime.now():%Y%m%d_%H%M%S}.zip")
+    bundle.set_defaults(handler=cmd_bundle)
+
+    alerts = commands.add_parser("alerts", help="evaluate expiry and reorder alerts")
+    alerts.add_argument("--kind", choices=["expiry", "reorder", "all"], default="all")
+    alerts.add_argument("--fail-on-alerts", action="store_true", help=f"exit with {EXIT_ATTENTION} when any alert fires")
+    alerts.set_defaults(handler=cmd_alerts)
+
+    import_ = commands.add_parser("import", help="import inventory rows from CSV in one transaction")
+    import_.add_argument("file", help="CSV with location_id, quantity, status and product_id or name/description/category")
+    import_.set_defaults(handler=cmd_import)
+
+    cycle_count = commands.add_parser("cycle-count", help="compare a warehouse or zone count with inventory and apply corrections")
+    cycle_count.add_argument("file", help="CSV with product_id, location_id, counted_quantity")
+    cycle_count.add_argument("--warehouse-id", type=int, required=True)
+    cycle_count.add_argument("--zone", help="counted zone; default is the whole warehouse")
+    cycle_count.add_argument("--apply", action="store_true", help="apply every correction with its audit record in one transaction")
+    cycle_count.add_argument("--reason", default="Cycle count")
+    cycle_count.add_argument("--changed-by", default="inventory_cli")
+    cycle_count.add_argument("--fail-on-variance", action="store_true", help=f"exit with {EXIT_ATTENTION} when any variance is found")
+    cycle_count.set_defaults(handler=cmd_cycle_count)
+
+    allocate = commands.add_parser("allocate", help="pick stock for order lines, earliest expiry first")
+    allocate.add_argument("file", help="CSV with product_id, quantity and optional location_id")
+    allocate.add_argument("--movement-type", choices=["sale", "transfer"], default="sale")
+    allocate.add_argument("--to-location", type=int, help="destination location for transfers")
+    allocate.add_argument("--dry-run", action="store_true", help="show the allocations without recording them")
+    allocate.set_defaults(handler=cmd_allocate)
+
+    forecast = commands.add_parser("forecast", help="compute reorder rules from sales history (requires numpy)")
+    forecast.add_argument("--history-days", type=int, default=90)
+    forecast.add_argument("--lead-time", type=int, default=7, help="lead time in days")
+    forecast.add_argument("--service-level", type=float, default=0.95, choices=[0.9, 0.95, 0.98, 0.99])
+    forecast.add_argument("--apply", action="store_true", help="write the suggested rules (bulk upsert)")
+    forecast.add_argument("--show-rules", action="store_true", help="include every suggested rule in the output")
+    forecast.set_defaults(handler=cmd_forecast)
+
+    generate = commands.add_parser("generate", help="generate synthetic demo data")
+    generate.add_argument("--warehouses", type=int, default=2)
+    generate.add_argument("--locations-per-warehouse", type=int, default=100)
+    generate.add_argument("--products", type=int, default=1000)
+    generate.add_argument("--movements", type=int, default=10000)
+    generate.add_argument("--batches", type=int, default=500)
+    generate.add_argument("--seed", type=int)
+    generate.set_defaults(handler=cmd_generate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # stdout is reserved for the JSON result
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    pool = ConnectionPool(size=max(1, args.jobs), **connection_args(args))
+    try:
+        result, exit_code = args.handler(pool, args)
+        output = {"command": args.command, "ok": True, **result}
+    except (ImportError, OSError, KeyError, ValueError, mysql.connector.Error) as e:
+        logging.error(f"{args.command} failed: {e}")
+        output, exit_code = {"command": args.command, "ok": False, "error": str(e)}, EXIT_ERROR
+    finally:
+        pool.close()
+    json.dump(output, sys.stdout, default=str)
+    sys.stdout.write("\n")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from database_manager import REPORT_QUERIES
+
+# Streams a report from the cursor into a CSV file, hashing the bytes as they are written.
+# progress(name, rows_written) is called after every chunk.
+def _write_report(db, name, path, chunk_size=5000, progress=None):
+    digest = hashlib.sha256()
+    row_count = 0
+    size = 0
+    with open(path, "wb") as f:
+        for chunk_number, chunk in enumerate(db.iter_report(name, chunk_size)):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if chunk_number == 0:
+                writer.writerow(chunk)
+            else:
+                writer.writerows(chunk)
+                row_count += len(chunk)
+            data = buffer.getvalue().encode("utf-8")
+            f.write(data)
+            digest.update(data)
+            size += len(data)
+            if progress and chunk_number:
+                progress(name, row_count)
+    return row_count, digest.hexdigest(), size
+
+def export_report(db, name, path=None, chunk_size=5000):
+    if name not in REPORT_QUERIES:
+        raise ValueError(f"Unknown report: {name}")
+    path = path or f"{name}.csv"
+    row_count, _, _ = _write_report(db, name, path, chunk_size)
+    logging.info(f"Report exported: {name} -> {path} ({row_count} rows)")
+    return {"report": name, "path": os.path.abspath(path), "rows": row_count}
+
+# Runs the selected reports at the same time, one pooled connection each, and packages the
+# CSV files into a zip archive with a manifest.json of row counts and SHA-256 checksums.
+# progress(name, state, rows) is called from worker threads with state "running", "done" or "failed".
+def export_bundle(pool, names, archive_path, chunk_size=5000, progress=None):
+    unknown = [name for name in names if name not in REPORT_QUERIES]
+    if unknown:
+        raise ValueError(f"Unknown report(s): {', '.join(unknown)}")
+    if not names:
+        raise ValueError("No reports selected")
+    notify = progress or (lambda name, state, rows: None)
+    work_dir = tempfile.mkdtemp(prefix="ims_bundle_")
+
+    def run(name):
+        started = time.perf_counter()
+        notify(name, "running", 0)
+        try:
+            with pool.connection() as db:
+                rows, sha256, size = _write_report(db, name, os.path.join(work_dir, f"{name}.csv"), chunk_size,
+                                                   lambda n, count: notify(n, "running", count))
+        except Exception:
+            notify(name, "failed", 0)
+            raise
+        notify(name, "done", rows)
+        return {"report": name, "file": f"{name}.csv", "rows": rows, "bytes": size, "sha256": sha256,
+                "seconds": round(time.perf_counter() - started, 3)}
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(pool.size, len(names))) as executor:
+            entries = list(executor.map(run, names))
+        manifest = {"created_at": datetime.now().isoformat(timespec="seconds"), "reports": entries}
+        with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for entry in entries:
+                archive.write(os.path.join(work_dir, entry["file"]), entry["file"])
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    logging.info(f"Report bundle exported: {archive_path} ({len(entries)} reports)")
+    return {"path": os.path.abspath(archive_path), **manifest}
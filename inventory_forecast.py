@@ -0,0 +1,91 @@
+import logging
+from datetime import date, timedelta
+
+import numpy as np
+
+# Standard normal quantiles for the service levels offered in the UI/CLI
+SERVICE_LEVEL_Z = {0.90: 1.2816, 0.95: 1.6449, 0.98: 2.0537, 0.99: 2.3263}
+
+# Daily sales per product and day, aggregated by the server and streamed to the client in chunks
+DAILY_SALES_SQL = '''
+    SELECT product_id, DATEDIFF(timestamp, %s) AS day, SUM(quantity)
+    FROM stock_movements
+    WHERE movement_type = 'sale' AND timestamp >= %s AND timestamp < %s
+    GROUP BY product_id, day
+'''
+
+# Suggested reorder rules for every product, one NumPy array per column
+class ReorderSuggestions:
+    def __init__(self, product_ids, demand_rate, demand_std, safety_stock, reorder_point, history_days, lead_time_days):
+        self.product_ids = product_ids
+        self.demand_rate = demand_rate
+        self.demand_std = demand_std
+        self.safety_stock = safety_stock
+        self.reorder_point = reorder_point
+        self.history_days = history_days
+        self.lead_time_days = lead_time_days
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def with_demand(self):
+        mask = self.demand_rate > 0
+        return ReorderSuggestions(self.product_ids[mask], self.demand_rate[mask], self.demand_std[mask],
+                                  self.safety_stock[mask], self.reorder_point[mask],
+                                  self.history_days, self.lead_time_days)
+
+    def rules(self):
+        # (product_id, min_threshold, reorder_point) tuples for DatabaseManager.set_reorder_rules.
+        # Reorder alerts fire at quantity <= min_threshold, so the reorder point is written there too:
+        # alerting at the safety stock would only warn once the lead-time demand is already used up.
+        reorder_point = self.reorder_point.tolist()
+        return list(zip(self.product_ids.tolist(), reorder_point, reorder_point))
+
+
+def load_daily_demand(db, product_ids, history_days, as_of=None, chunk_size=100000):
+    # Returns a (products x days) matrix of units sold, products in the order of product_ids (sorted)
+    end = (as_of or date.today()) + timedelta(days=1)
+    start = end - timedelta(days=history_days)
+    demand = np.zeros(len(product_ids) * history_days, dtype=np.float64)
+    cursor = db.conn.cursor()
+    try:
+        cursor.execute(DAILY_SALES_SQL, (start, start, end))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            chunk = np.array(rows, dtype=np.float64)
+            ids = chunk[:, 0].astype(np.int64)
+            days = chunk[:, 1].astype(np.int64)
+            positions = np.searchsorted(product_ids, ids)
+            positions = np.minimum(positions, len(product_ids) - 1)
+            # Drop movements of products that no longer exist and days outside the window
+            valid = (product_ids[positions] == ids) & (days >= 0) & (days < history_days)
+            demand += np.bincount(positions[valid] * history_days + days[valid], weights=chunk[valid, 2],
+                                  minlength=demand.size)
+    finally:
+        cursor.close()
+    return demand.reshape(len(product_ids), history_days)
+
+
+def compute_reorder_suggestions(db, history_days=90, lead_time_days=7, service_level=0.95, as_of=None, chunk_size=100000):
+    # Safety stock = z * daily std * sqrt(lead time); reorder point = lead-time demand + safety stock.
+    # The reorder point is suggested as both min_threshold (the alert level) and reorder_point.
+    if history_days < 2 or lead_time_days <= 0:
+        raise ValueError("History must cover at least 2 days and lead time must be positive")
+    z = SERVICE_LEVEL_Z.get(service_level)
+    if z is None:
+        raise ValueError(f"Service level must be one of {', '.join(str(level) for level in SERVICE_LEVEL_Z)}")
+    product_ids = np.array(sorted(row[0] for row in db.get_products()), dtype=np.int64)
+    if not len(product_ids):
+        empty = np.zeros(0)
+        return ReorderSuggestions(product_ids, empty, empty, empty.astype(np.int64), empty.astype(np.int64),
+                                  history_days, lead_time_days)
+    demand = load_daily_demand(db, product_ids, history_days, as_of, chunk_size)
+    demand_rate = demand.mean(axis=1)
+    demand_std = demand.std(axis=1, ddof=1)
+    safety_stock = np.ceil(z * demand_std * np.sqrt(lead_time_days)).astype(np.int64)
+    reorder_point = np.ceil(demand_rate * lead_time_days).astype(np.int64) + safety_stock
+    logging.info(f"Reorder suggestions computed: {len(product_ids)} products, {history_days} days of history")
+    return ReorderSuggestions(product_ids, demand_rate, demand_std, safety_stock, reorder_point,
+                              history_days, lead_time_days)
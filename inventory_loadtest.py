@@ -0,0 +1,145 @@
+# Load test for inventory_api.py: keeps N keep-alive connections busy for a fixed duration
+# and reports sustained requests per second and latency percentiles as JSON.
+#
+#   python inventory_api.py &
+#   python inventory_loadtest.py --connections 32 --duration 30 --write-ratio 0.2
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+
+class Client:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        content = json.dumps(body).encode() if body is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(content)}\r\n\r\n".encode() + content)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        payload = await self.reader.readexactly(length)
+        return status, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def discover_ids(client, sample):
+    # (product_id, inventory_id, location_id) write targets and the stock each row holds
+    status, payload = await client.request("GET", f"/inventory/summary?limit={sample}")
+    if status != 200:
+        raise RuntimeError(f"Could not load inventory sample: HTTP {status}")
+    items = json.loads(payload)["items"]
+    if not items:
+        raise RuntimeError("Inventory is empty; run `inventory_cli.py generate` first")
+    ids = [(item["product_id"], item["inventory_id"], item["location_id"]) for item in items]
+    stock = {item["inventory_id"]: item["quantity"] or 0 for item in items}
+    return ids, stock
+
+
+async def worker(client, ids, stock, deadline, write_ratio, latencies, errors, rng):
+    # stock is shared by every worker (one event loop, so no locking) and kept in step with the
+    # writes, so sales only take stock the row still holds and the traffic stays valid
+    while time.perf_counter() < deadline:
+        product_id, inventory_id, location_id = rng.choice(ids)
+        roll = rng.random()
+        if roll < write_ratio:
+            if rng.random() < 0.5 and stock[inventory_id] > 0:
+                stock[inventory_id] -= 1
+                body = {"product_id": product_id, "quantity": 1, "from_location": location_id, "movement_type": "sale"}
+            else:
+                stock[inventory_id] += 1
+                body = {"product_id": product_id, "quantity": 1, "to_location": location_id, "movement_type": "restock"}
+            method, path = "POST", "/movements"
+        elif roll < write_ratio + (1 - write_ratio) / 2:
+            method, path, body = "GET", f"/products/{product_id}", None
+        else:
+            method, path, body = "GET", f"/inventory/summary?after={inventory_id - 1}&limit=50", None
+        started = time.perf_counter()
+        try:
+            status, _ = await client.request(method, path, body)
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            client.close()
+            client.writer = None
+            errors.append("connection")
+            continue
+        latencies.append(time.perf_counter() - started)
+        if status >= 400:
+            errors.append(status)
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    setup = Client(args.host, args.port)
+    ids, stock = await discover_ids(setup, args.sample)
+    setup.close()
+    clients = [Client(args.host, args.port) for _ in range(args.connections)]
+    latencies, errors = [], []
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(worker(client, ids, stock, deadline, args.write_ratio, latencies, errors, random.Random(rng.random()))
+                           for client in clients))
+    elapsed = time.perf_counter() - started
+    for client in clients:
+        client.close()
+    latencies.sort()
+    return {
+        "connections": args.connections,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+            "p95": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+            "p99": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+            "max": round(latencies[-1] * 1000, 2) if latencies else None,
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="inventory_loadtest", description="Load test the local inventory API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="share of requests that post movements")
+    parser.add_argument("--sample", type=int, default=1000, help="inventory rows used to pick request targets")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    try:
+        result = asyncio.run(run(args))
+    except (OSError, RuntimeError) as e:
+        print(json.dumps({"ok": False, "error": str(e)}))
+        return 1
+    print(json.dumps({"ok": True, **result}))
+    return 0 if result["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
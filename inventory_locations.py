@@ -0,0 +1,186 @@
+import logging
+import threading
+from bisect import insort
+
+LEVELS = ("warehouse", "zone", "aisle", "bin")
+
+LOCATION_TREE_SQL = '''
+    SELECT l.location_id, w.warehouse_id, w.name, l.zone, l.aisle, l.bin
+    FROM locations l
+    JOIN warehouses w ON l.warehouse_id = w.warehouse_id
+'''
+
+INVENTORY_ROWS_SQL = 'SELECT inventory_id, product_id, location_id, quantity FROM inventory'
+
+# Tables whose writes the hierarchy follows. Locations are only ever added, so new ones are read by
+# id; inventory changes are applied row by row.
+HIERARCHY_TABLES = ("warehouses", "locations", "inventory")
+
+# One warehouse, zone, aisle or bin with the quantity held below it, in total and per product
+class LocationNode:
+    __slots__ = ("key", "name", "level", "parent", "children", "child_names", "total", "products")
+
+    def __init__(self, key, name, level, parent=None):
+        self.key = key
+        self.name = name
+        self.level = level
+        self.parent = parent
+        self.children = {}
+        self.child_names = []
+        self.total = 0
+        self.products = {}
+
+    def add(self, product_id, delta):
+        self.total += delta
+        quantity = self.products.get(product_id, 0) + delta
+        if quantity:
+            self.products[product_id] = quantity
+        else:
+            self.products.pop(product_id, None)
+
+    def quantity(self, product_id=None):
+        return self.total if product_id is None else self.products.get(product_id, 0)
+
+    def sorted_children(self):
+        return [self.children[key] for _, _, key in self.child_names]
+
+    def path(self):
+        node, names = self, []
+        while node:
+            names.append(node.name)
+            node = node.parent
+        return list(reversed(names))
+
+
+# Warehouse -> zone -> aisle -> bin tree built from locations, with quantity rollups at every
+# level kept current by applying inventory row changes up the path (four dict updates per change).
+# Zones and aisles are also rolled up by name across warehouses, e.g. "Zone A" everywhere.
+class LocationHierarchy:
+    def __init__(self):
+        self.roots = {}
+        self.root_names = []
+        self.nodes = {}
+        self.bins = {}
+        self.by_name = {"zone": {}, "aisle": {}}
+        self.empty = {level: set() for level in LEVELS}
+        self.rows = {}
+        self.versions = {}
+        self.last_location_id = 0
+        self.lock = threading.RLock()
+
+    @classmethod
+    def load(cls, db, chunk_size=100000):
+        # The change versions are read in the same snapshot as the locations and inventory
+        hierarchy = cls()
+        versions = db.get_change_versions()
+        hierarchy.versions = {table: versions.get(table) for table in HIERARCHY_TABLES}
+        cursor = db.conn.cursor()
+        try:
+            cursor.execute(LOCATION_TREE_SQL)
+            for row in cursor.fetchall():
+                hierarchy.add_location(*row)
+            cursor.execute(INVENTORY_ROWS_SQL)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    hierarchy.set_row(*row)
+        finally:
+            cursor.close()
+        logging.info(f"Location hierarchy loaded: {len(hierarchy.bins)} locations, {len(hierarchy.rows)} inventory rows")
+        return hierarchy
+
+    def refresh(self, db):
+        # Adds the new locations, then applies the changed inventory rows. The locations are read
+        # first, in the same snapshot, so every changed row's location is already in the tree.
+        # Returns the hierarchy to use from now on (this one).
+        versions = db.get_change_versions()
+        if all(versions.get(table) == self.versions.get(table) for table in HIERARCHY_TABLES):
+            return self
+        cursor = db.conn.cursor()
+        try:
+            cursor.execute(LOCATION_TREE_SQL + ' WHERE l.location_id > %s', (self.last_location_id,))
+            locations = cursor.fetchall()
+        finally:
+            cursor.close()
+        rows = []
+        if versions.get("inventory") != self.versions.get("inventory"):
+            rows = db.get_inventory_rows_since(self.versions["inventory"])
+        with self.lock:
+            for row in locations:
+                self.add_location(*row)
+            for row in rows:
+                self.set_row(*row)
+            self.versions = {table: versions.get(table) for table in HIERARCHY_TABLES}
+        logging.debug(f"Location hierarchy refreshed: {len(locations)} new locations, {len(rows)} changed inventory rows")
+        return self
+
+    def _child(self, parent, key, name, level):
+        node = self.nodes.get(key)
+        if node is None:
+            node = LocationNode(key, name, level, parent)
+            self.nodes[key] = node
+            self.empty[level].add(key)
+            if parent is None:
+                self.roots[key] = node
+                insort(self.root_names, (str(name or ""), len(self.root_names), key))
+            else:
+                parent.children[key] = node
+                insort(parent.child_names, (str(name or ""), len(parent.child_names), key))
+        return node
+
+    def add_location(self, location_id, warehouse_id, warehouse_name, zone, aisle, bin):
+        warehouse = self._child(None, (warehouse_id,), warehouse_name, "warehouse")
+        zone_node = self._child(warehouse, (warehouse_id, zone), zone, "zone")
+        aisle_node = self._child(zone_node, (warehouse_id, zone, aisle), aisle, "aisle")
+        self.bins[location_id] = self._child(aisle_node, (warehouse_id, zone, aisle, location_id), bin, "bin")
+        self.last_location_id = max(self.last_location_id, location_id)
+
+    def set_row(self, inventory_id, product_id, location_id, quantity):
+        quantity = quantity or 0
+        old = self.rows.get(inventory_id)
+        if old:
+            self._apply(old[0], old[1], -old[2])
+        self.rows[inventory_id] = (product_id, location_id, quantity)
+        self._apply(product_id, location_id, quantity)
+
+    def _apply(self, product_id, location_id, delta):
+        node = self.bins.get(location_id)
+        if node is None or not delta:
+            return
+        rollups = (self._name_rollup("aisle", node.parent.name), self._name_rollup("zone", node.parent.parent.name))
+        while node is not None:
+            node.add(product_id, delta)
+            if node.total:
+                self.empty[node.level].discard(node.key)
+            else:
+                self.empty[node.level].add(node.key)
+            node = node.parent
+        for rollup in rollups:
+            rollup.add(product_id, delta)
+
+    def _name_rollup(self, level, name):
+        rollup = self.by_name[level].get(name)
+        if rollup is None:
+            rollup = self.by_name[level][name] = LocationNode(("*", name), name, level)
+        return rollup
+
+    def warehouses(self):
+        return [self.roots[key] for _, _, key in self.root_names]
+
+    def node(self, warehouse_id=None, path=(), location_id=None):
+        # Dict lookup of one node. path is (zone,) or (zone, aisle) below the warehouse, positionally,
+        # so a None part is a NULL zone or aisle rather than a skipped level
+        if location_id is not None:
+            return self.bins.get(location_id)
+        return self.nodes.get((warehouse_id,) + tuple(path))
+
+    def quantity_by_name(self, level, name, product_id=None):
+        # e.g. quantity_by_name("zone", "Zone A", product_id) across every warehouse
+        rollup = self.by_name[level].get(name)
+        return rollup.quantity(product_id) if rollup else 0
+
+    def empty_nodes(self, level, warehouse_id=None):
+        keys = self.empty[level] if warehouse_id is None else [key for key in self.empty[level] if key[0] == warehouse_id]
+        return sorted((self.nodes[key] for key in keys), key=lambda node: [str(part or "") for part in node.path()])
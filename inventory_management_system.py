@@ -1,302 +1,190 @@
 import mysql.connector
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
+from bisect import bisect_left
 import csv
+import heapq
+import queue
+import threading
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from ttkbootstrap.tooltip import ToolTip
 import logging
+from database_manager import ConcurrentUpdateError, ConnectionPool, DatabaseManager, INVENTORY_STATUSES, REPORT_TABLES
+from inventory_allocation import StockAllocator
+from inventory_forecast import compute_reorder_suggestions
+from inventory_locations import LocationHierarchy
+from inventory_model import InventoryModel, SUMMARY_COLUMNS
+from inventory_export import export_bundle
+from inventory_scan import COUNT_MODE, ScanSession, parse_barcode, post_lines
 
 # Set up logging for debugging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Database Manager Class for MySQL
-class DatabaseManager:
-    def __init__(self, host="127.0.0.1", user="root", password="", database="inventory_db"):
-        try:
-            self.conn = mysql.connector.connect(
-                host=host,
-                user=user,
-                password=password,
-                database=database
-            )
-            self.cursor = self.conn.cursor()
-            self.create_tables()
-            logging.info("Database connection established")
-        except mysql.connector.Error as e:
-            logging.error(f"Database connection failed: {e}")
-            raise
-
-    def create_tables(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS products (
-                product_id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                description TEXT,
-                category VARCHAR(100)
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS warehouses (
-                warehouse_id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                location VARCHAR(255)
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS locations (
-                location_id INT AUTO_INCREMENT PRIMARY KEY,
-                warehouse_id INT,
-                zone VARCHAR(50),
-                aisle VARCHAR(50),
-                bin VARCHAR(50),
-                FOREIGN KEY (warehouse_id) REFERENCES warehouses(warehouse_id) ON DELETE CASCADE
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS inventory (
-                inventory_id INT AUTO_INCREMENT PRIMARY KEY,
-                product_id INT,
-                location_id INT,
-                quantity INT,
-                status ENUM('available', 'reserved', 'in-transit', 'damaged'),
-                FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE,
-                FOREIGN KEY (location_id) REFERENCES locations(location_id) ON DELETE CASCADE
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS serial_batches (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                product_id INT,
-                serial_or_batch_number VARCHAR(100),
-                type ENUM('serial', 'batch'),
-                expiry_date DATE,
-                received_date DATE,
-                FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS stock_movements (
-                movement_id INT AUTO_INCREMENT PRIMARY KEY,
-                product_id INT,
-                quantity INT,
-                from_location INT,
-                to_location INT,
-                movement_type VARCHAR(50),
-                timestamp DATETIME,
-                FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE,
-                FOREIGN KEY (from_location) REFERENCES locations(location_id) ON DELETE SET NULL,
-                FOREIGN KEY (to_location) REFERENCES locations(location_id) ON DELETE SET NULL
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS reorder_rules (
-                product_id INT,
-                min_threshold INT,
-                reorder_point INT,
-                auto_order_enabled BOOLEAN,
-                FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE,
-                PRIMARY KEY (product_id)
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS audit_logs (
-                audit_id INT AUTO_INCREMENT PRIMARY KEY,
-                inventory_id INT,
-                action VARCHAR(255),
-                reason TEXT,
-                changed_by VARCHAR(100),
-                timestamp DATETIME,
-                FOREIGN KEY (inventory_id) REFERENCES inventory(inventory_id) ON DELETE CASCADE
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(50) UNIQUE,
-                password VARCHAR(255),
-                role ENUM('Admin', 'Warehouse Manager', 'Auditor')
-            )
-        ''')
-        self.conn.commit()
-        logging.info("Database tables created or verified")
-
-    def add_product(self, name, description, category):
-        try:
-            self.cursor.execute('INSERT INTO products (name, description, category) VALUES (%s, %s, %s)',
-                              (name, description, category))
-            self.conn.commit()
-            logging.info(f"Product added: {name}")
-        except mysql.connector.Error as e:
-            logging.error(f"Error adding product: {e}")
-            raise
-
-    def add_warehouse(self, name, location):
-        try:
-            self.cursor.execute('INSERT INTO warehouses (name, location) VALUES (%s, %s)', (name, location))
-            self.conn.commit()
-            logging.info(f"Warehouse added: {name}")
-        except mysql.connector.Error as e:
-            logging.error(f"Error adding warehouse: {e}")
-            raise
-
-    def add_location(self, warehouse_id, zone, aisle, bin):
-        try:
-            self.cursor.execute('INSERT INTO locations (warehouse_id, zone, aisle, bin) VALUES (%s, %s, %s, %s)',
-                              (warehouse_id, zone, aisle, bin))
-            self.conn.commit()
-            logging.info(f"Location added: {zone}, {aisle}, {bin}")
-        except mysql.connector.Error as e:
-            logging.error(f"Error adding location: {e}")
-            raise
-
-    def add_inventory(self, product_id, location_id, quantity, status):
-        try:
-            # Check if inventory record exists for product_id and location_id
-            self.cursor.execute('SELECT inventory_id, quantity FROM inventory WHERE product_id = %s AND location_id = %s',
-                              (product_id, location_id))
-            existing = self.cursor.fetchone()
-            if existing:
-                inventory_id, current_quantity = existing
-                new_quantity = current_quantity + quantity
-                self.cursor.execute('UPDATE inventory SET quantity = %s, status = %s WHERE inventory_id = %s',
-                                  (new_quantity, status, inventory_id))
-                logging.info(f"Updated inventory: product_id={product_id}, location_id={location_id}, new_quantity={new_quantity}")
-            else:
-                self.cursor.execute('INSERT INTO inventory (product_id, location_id, quantity, status) VALUES (%s, %s, %s, %s)',
-                                  (product_id, location_id, quantity, status))
-                logging.info(f"Added new inventory: product_id={product_id}, location_id={location_id}, quantity={quantity}")
-            self.conn.commit()
-        except mysql.connector.Error as e:
-            logging.error(f"Error adding/updating inventory: {e}")
-            raise
-
-    def add_serial_batch(self, product_id, serial_or_batch_number, type, expiry_date, received_date):
-        try:
-            self.cursor.execute('INSERT INTO serial_batches (product_id, serial_or_batch_number, type, expiry_date, received_date) VALUES (%s, %s, %s, %s, %s)',
-                              (product_id, serial_or_batch_number, type, expiry_date, received_date))
-            self.conn.commit()
-            logging.info(f"Serial/Batch added: {serial_or_batch_number}")
-        except mysql.connector.Error as e:
-            logging.error(f"Error adding serial/batch: {e}")
-            raise
-
-    def log_movement(self, product_id, quantity, from_location, to_location, movement_type):
-        try:
-            timestamp = datetime.now()
-            self.cursor.execute('INSERT INTO stock_movements (product_id, quantity, from_location, to_location, movement_type, timestamp) VALUES (%s, %s, %s, %s, %s, %s)',
-                              (product_id, quantity, from_location, to_location, movement_type, timestamp))
-            self.conn.commit()
-            logging.info(f"Movement logged: {movement_type}, product_id={product_id}")
-        except mysql.connector.Error as e:
-            logging.error(f"Error logging movement: {e}")
-            raise
-
-    def log_audit(self, inventory_id, action, reason, changed_by):
-        try:
-            timestamp = datetime.now()
-            self.cursor.execute('INSERT INTO audit_logs (inventory_id, action, reason, changed_by, timestamp) VALUES (%s, %s, %s, %s, %s)',
-                              (inventory_id, action, reason, changed_by, timestamp))
-            self.conn.commit()
-            logging.info(f"Audit logged: inventory_id={inventory_id}, action={action}")
-        except mysql.connector.Error as e:
-            logging.error(f"Error logging audit: {e}")
-            raise
-
-    def set_reorder_rule(self, product_id, min_threshold, reorder_point, auto_order_enabled):
-        try:
-            self.cursor.execute('INSERT INTO reorder_rules (product_id, min_threshold, reorder_point, auto_order_enabled) VALUES (%s, %s, %s, %s) '
-                              'ON DUPLICATE KEY UPDATE min_threshold=%s, reorder_point=%s, auto_order_enabled=%s',
-                              (product_id, min_threshold, reorder_point, auto_order_enabled, min_threshold, reorder_point, auto_order_enabled))
-            self.conn.commit()
-            logging.info(f"Reorder rule set: product_id={product_id}")
-        except mysql.connector.Error as e:
-            logging.error(f"Error setting reorder rule: {e}")
-            raise
-
-    def check_expiry_alerts(self):
-        today = datetime.now().date()
-        thresholds = [30, 60, 90]
-        alerts = []
-        self.cursor.execute('SELECT product_id, serial_or_batch_number, expiry_date FROM serial_batches')
-        for row in self.cursor.fetchall():
-            product_id, batch_number, expiry_date = row
-            if expiry_date:
-                days_to_expiry = (expiry_date - today).days
-                for days in thresholds:
-                    if 0 <= days_to_expiry <= days:
-                        alerts.append((product_id, batch_number, days))
-        return alerts
-
-    def check_reorder_alerts(self):
-        alerts = []
-        self.cursor.execute('''
-            SELECT i.product_id, i.quantity, r.min_threshold, r.reorder_point
-            FROM inventory i
-            JOIN reorder_rules r ON i.product_id = r.product_id
-            WHERE r.auto_order_enabled = 1 AND i.quantity <= r.min_threshold
-        ''')
-        for row in self.cursor.fetchall():
-            alerts.append(row)
-        return alerts
-
-    def get_inventory_summary(self):
-        try:
-            self.cursor.execute('''
-                SELECT i.inventory_id, p.product_id, p.name, i.quantity, i.status, w.name, l.zone, l.aisle, l.bin                
-                FROM inventory i
-                JOIN products p ON i.product_id = p.product_id
-                JOIN locations l ON i.location_id = l.location_id
-                JOIN warehouses w ON l.warehouse_id = w.warehouse_id
-            ''')
-            result = self.cursor.fetchall()
-            logging.info(f"Inventory summary retrieved: {len(result)} records")
-            return result
-        except mysql.connector.Error as e:
-            logging.error(f"Error retrieving inventory summary: {e}")
-            return []
-
-    def get_warehouses(self):
-        try:
-            self.cursor.execute('SELECT warehouse_id, name, location FROM warehouses')
-            return self.cursor.fetchall()
-        except mysql.connector.Error as e:
-            logging.error(f"Error retrieving warehouses: {e}")
-            return []
-
-    def get_locations(self):
-        try:
-            self.cursor.execute('''
-                SELECT l.location_id, w.name, l.zone, l.aisle, l.bin
-                FROM locations l
-                JOIN warehouses w ON l.warehouse_id = w.warehouse_id
-            ''')
-            return self.cursor.fetchall()
-        except mysql.connector.Error as e:
-            logging.error(f"Error retrieving locations: {e}")
-            return []
-
-    def get_products(self):
-        try:
-            self.cursor.execute('SELECT product_id, name FROM products')
-            return self.cursor.fetchall()
-        except mysql.connector.Error as e:
-            logging.error(f"Error retrieving products: {e}")
-            return []
-
-    def authenticate_user(self, username, password):
-        try:
-            self.cursor.execute('SELECT role FROM users WHERE username = %s AND password = %s', (username, password))
-            result = self.cursor.fetchone()
-            return result[0] if result else None
-        except mysql.connector.Error as e:
-            logging.error(f"Error authenticating user: {e}")
+# Pending scans are written to the database at most this often
+SCAN_FLUSH_INTERVAL_MS = 2000
+# How often the change_versions table is polled for writes made by other clients
+CHANGE_POLL_INTERVAL_MS = 3000
+# Treeview items created for the dashboard grid; filtering and totals always cover every row
+DASHBOARD_ROW_LIMIT = 2000
+# Rows shown on the reorder suggestion review screen, largest changes first
+REVIEW_ROW_LIMIT = 1000
+
+# Sorted prefix index used by the type-ahead pickers
+class PrefixIndex:
+    def __init__(self, entries=()):
+        self.rebuild(entries)
+
+    @staticmethod
+    def normalize(text):
+        return " ".join(str(text).casefold().split())
+
+    def rebuild(self, entries):
+        # entries: iterable of (entry_id, label, search_keys)
+        self.labels = {}
+        self.ids_by_label = {}
+        self.max_id = 0
+        self.keys = []
+        self.key_ids = []
+        self.add(entries)
+
+    def add(self, entries):
+        # New entries are sorted on their own and merged into the sorted keys in one pass
+        pairs = []
+        for entry_id, label, keys in entries:
+            self.labels[entry_id] = label
+            self.ids_by_label[label] = entry_id
+            self.max_id = max(self.max_id, entry_id)
+            for key in keys:
+                normalized = self.normalize(key)
+                if normalized:
+                    pairs.append((normalized, entry_id))
+        if not pairs:
+            return
+        pairs.sort()
+        merged = list(heapq.merge(zip(self.keys, self.key_ids), pairs))
+        self.keys = [key for key, _ in merged]
+        self.key_ids = [entry_id for _, entry_id in merged]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def search(self, text, limit=20):
+        prefix = self.normalize(text)
+        results = []
+        seen = set()
+        # An exact ID match is always offered first
+        if prefix.isdigit() and int(prefix) in self.labels:
+            results.append((int(prefix), self.labels[int(prefix)]))
+            seen.add(int(prefix))
+        position = bisect_left(self.keys, prefix)
+        while position < len(self.keys) and len(results) < limit:
+            if not self.keys[position].startswith(prefix):
+                break
+            entry_id = self.key_ids[position]
+            if entry_id not in seen:
+                seen.add(entry_id)
+                results.append((entry_id, self.labels[entry_id]))
+            position += 1
+        return results
+
+    def lookup(self, label):
+        return self.ids_by_label.get(label)
+
+# Combobox that queries a PrefixIndex as the user types and returns ids directly
+class TypeAheadCombobox(ttk.Combobox):
+    def __init__(self, master, index, min_chars=2, max_results=20, delay_ms=150, **kwargs):
+        super().__init__(master, **kwargs)
+        self.index = index
+        self.min_chars = min_chars
+        self.max_results = max_results
+        self.delay_ms = delay_ms
+        self.matches = {}
+        self._pending = None
+        self._popup = None
+        self._listbox = None
+        self.bind("<KeyRelease>", self.on_key_release)
+        self.bind("<Down>", self.focus_popup)
+        self.bind("<Escape>", lambda e: self.hide_popup())
+        self.bind("<FocusOut>", lambda e: self.after(100, self.hide_unless_focused))
+
+    def on_key_release(self, event):
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        if self._pending:
+            self.after_cancel(self._pending)
+        self._pending = self.after(self.delay_ms, self.refresh_matches)
+
+    def refresh_matches(self):
+        self._pending = None
+        text = self.get().strip()
+        if len(text) < self.min_chars and not text.isdigit():
+            self.matches = {}
+        else:
+            self.matches = {label: entry_id for entry_id, label in self.index.search(text, self.max_results)}
+        self["values"] = list(self.matches)
+        if self.matches:
+            self.show_popup()
+        else:
+            self.hide_popup()
+
+    def show_popup(self):
+        # Suggestion list just below the entry, shown while typing (focus stays in the entry)
+        if self._popup is None:
+            self._popup = tk.Toplevel(self)
+            self._popup.overrideredirect(True)
+            self._listbox = tk.Listbox(self._popup, exportselection=False)
+            self._listbox.pack(fill="both", expand=True)
+            self._listbox.bind("<ButtonRelease-1>", self.choose_match)
+            self._listbox.bind("<Return>", self.choose_match)
+            self._listbox.bind("<Escape>", lambda e: (self.hide_popup(), self.focus_set()))
+            self._listbox.bind("<FocusOut>", lambda e: self.after(100, self.hide_unless_focused))
+        self._listbox.delete(0, "end")
+        for label in self.matches:
+            self._listbox.insert("end", label)
+        self._listbox.configure(height=min(len(self.matches), 10), width=max(len(label) for label in self.matches))
+        self._popup.geometry(f"+{self.winfo_rootx()}+{self.winfo_rooty() + self.winfo_height()}")
+        self._popup.deiconify()
+        self._popup.lift()
+
+    def hide_popup(self):
+        if self._popup is not None:
+            self._popup.withdraw()
+
+    def hide_unless_focused(self):
+        if self._popup is not None and str(self.tk.call("focus")) not in (str(self), str(self._listbox)):
+            self.hide_popup()
+
+    def focus_popup(self, event):
+        # Down moves into the suggestion list instead of opening the combobox dropdown
+        if self._popup is None or not self._popup.winfo_viewable():
             return None
-
-    def close(self):
-        self.conn.close()
-        logging.info("Database connection closed")
+        self._listbox.focus_set()
+        self._listbox.selection_clear(0, "end")
+        self._listbox.selection_set(0)
+        self._listbox.activate(0)
+        return "break"
+
+    def choose_match(self, event):
+        selection = self._listbox.curselection()
+        if not selection:
+            return
+        self.set(self._listbox.get(selection[0]))
+        self.hide_popup()
+        self.focus_set()
+        self.icursor("end")
+
+    def set_id(self, entry_id):
+        label = self.index.labels.get(entry_id, "")
+        self.matches = {label: entry_id} if label else {}
+        self.set(label)
+
+    def get_id(self):
+        text = self.get()
+        if text in self.matches:
+            return self.matches[text]
+        return self.index.lookup(text)
 
 # GUI Application
 class InventoryApp:
@@ -307,6 +195,19 @@ class InventoryApp:
         self.db = DatabaseManager(host="127.0.0.1", user="root", password="", database="inventory_db")
         self.current_user = None
         self.role = None
+        self.product_index = PrefixIndex()
+        self.location_index = PrefixIndex()
+        self.scan_session = None
+        self.scan_results = queue.Queue()
+        self.scan_flushing = False
+        self.scan_flush_thread = None
+        self.scan_error_shown = False
+        self.worker_pool = ConnectionPool(size=1, **self.db.connection_args)
+        self.seen_versions = {}
+        self.current_report = None
+        self.change_poll_job = None
+        self.allocator = None
+        self.location_hierarchy = None
 
         # Main frame
         self.main_frame = ttk.Frame(self.root, padding=10)
@@ -322,6 +223,23 @@ class InventoryApp:
 
     def on_closing(self):
         try:
+            if self.change_poll_job:
+                self.root.after_cancel(self.change_poll_job)
+            if self.scan_flushing:
+                # A flush in flight owns its lines: wait for it and put back what it did not post
+                self.scan_flush_thread.join()
+                lines, posted, rejected, _ = self.scan_results.get_nowait()
+                for key, quantity, message in rejected:
+                    logging.error(f"Scan line {key} x{quantity} rejected: {message}")
+                self.restore_unposted(lines, posted, rejected)
+            lines = self.scan_session.drain() if self.scan_session else None
+            if lines:
+                _, rejected, error = post_lines(self.db, lines)
+                for key, quantity, message in rejected:
+                    logging.error(f"Scan line {key} x{quantity} not posted: {message}")
+                if error:
+                    raise error
+            self.worker_pool.close()
             self.db.close()
             self.root.destroy()
         except Exception as e:
@@ -360,6 +278,9 @@ class InventoryApp:
 
     def create_main_interface(self):
         self.clear_main_frame()
+        self.seen_versions = self.db.get_change_versions()
+        self.current_report = None
+        self.load_picker_indexes()
 
         # Notebook for tabs
         notebook = ttk.Notebook(self.main_frame)
@@ -372,6 +293,11 @@ class InventoryApp:
         notebook.add(self.dashboard_frame, text="Dashboard")
         self.update_dashboard()
 
+        # Locations tab
+        self.locations_frame = ttk.Frame(notebook, padding=10)
+        notebook.add(self.locations_frame, text="Locations")
+        self.create_locations_view()
+
         # Add Product tab
         self.add_product_frame = ttk.Frame(notebook, padding=10)
         notebook.add(self.add_product_frame, text="Add Product")
@@ -393,6 +319,12 @@ class InventoryApp:
             notebook.add(self.stock_movement_frame, text="Stock Movement")
             self.create_stock_movement_form()
 
+        # Scan tab
+        if self.role in ["Admin", "Warehouse Manager"]:
+            self.scan_frame = ttk.Frame(notebook, padding=10)
+            notebook.add(self.scan_frame, text="Scan")
+            self.create_scan_form()
+
         # Serial/Batch tab
         if self.role in ["Admin", "Warehouse Manager"]:
             self.serial_batch_frame = ttk.Frame(notebook, padding=10)
@@ -404,6 +336,7 @@ class InventoryApp:
             self.adjust_inventory_frame = ttk.Frame(notebook, padding=10)
             notebook.add(self.adjust_inventory_frame, text="Adjust Inventory")
             self.create_adjust_inventory_form()
+            self.create_cycle_count_form()
 
         # Reorder Rules tab
         if self.role == "Admin":
@@ -416,27 +349,93 @@ class InventoryApp:
         notebook.add(self.reports_frame, text="Reports")
         self.create_reports_form()
 
+        if self.change_poll_job:
+            self.root.after_cancel(self.change_poll_job)
+        self.change_poll_job = self.root.after(CHANGE_POLL_INTERVAL_MS, self.poll_changes)
+
+    def poll_changes(self):
+        # Cheap check of the per-table versions; only tables that moved are re-read
+        try:
+            versions = self.db.get_change_versions()
+            changed = {table for table, version in versions.items() if version != self.seen_versions.get(table)}
+            if versions.get("inventory", 0) > self.dashboard_version and self.dashboard_tree.winfo_exists():
+                rows = self.db.get_inventory_changes(self.dashboard_version)
+                self.dashboard_version = versions["inventory"]
+                self.inventory_model.upsert_rows(rows)
+                self.refresh_dashboard_summary()
+                self.refresh_dashboard_grid()
+                logging.debug(f"Dashboard updated with {len(rows)} changed inventory rows")
+            if changed & {"products", "locations"}:
+                self.load_picker_indexes(incremental=True)
+            if changed & {"inventory", "locations", "warehouses"} and self.location_hierarchy is not None:
+                self.location_hierarchy = self.location_hierarchy.refresh(self.db)
+                if "locations" in changed:
+                    # New locations may add warehouses, zones or aisles to the tree
+                    self.fill_location_tree()
+                else:
+                    self.update_location_tree()
+            if self.current_report and changed.intersection(REPORT_TABLES[self.current_report]):
+                self.update_report(versions, changed)
+            self.seen_versions = versions
+        except mysql.connector.Error as e:
+            logging.error(f"Error polling for changes: {e}")
+        self.change_poll_job = self.root.after(CHANGE_POLL_INTERVAL_MS, self.poll_changes)
+
+    def load_picker_indexes(self, incremental=False):
+        # Products and locations are only ever added, so an incremental load reads just the rows
+        # with a higher id than the index holds and merges them in
+        if not incremental:
+            self.product_index.rebuild(())
+            self.location_index.rebuild(())
+        self.product_index.add(
+            (p[0], f"{p[1]} (ID: {p[0]})", (p[1],)) for p in self.db.get_products(self.product_index.max_id)
+        )
+        self.location_index.add(
+            (loc[0], f"{loc[1]} (Zone: {loc[2]}, Aisle: {loc[3]}, Bin: {loc[4]}, ID: {loc[0]})", (loc[1], loc[2], loc[4]))
+            for loc in self.db.get_locations(self.location_index.max_id)
+        )
+
     def update_dashboard(self):
         for widget in self.dashboard_frame.winfo_children():
             widget.destroy()
 
+        # Load the inventory summary by column; the grid, filters and totals all work on this model.
+        # The inventory version is read in the same snapshot, so later polls fetch only newer rows.
+        self.dashboard_version = self.db.get_change_versions()["inventory"]
+        chunks = self.db.iter_report("inventory_summary")
+        next(chunks)
+        self.inventory_model = InventoryModel.from_chunks(chunks)
+        self.dashboard_filter = ""
+        self.dashboard_sort = (None, False)
+
         # Search bar
         search_frame = ttk.Frame(self.dashboard_frame)
         search_frame.grid(row=0, column=0, sticky="ew", padx=5, pady=5)
         ttk.Label(search_frame, text="Search Product:").grid(row=0, column=0, padx=5, pady=5)
         search_entry = ttk.Entry(search_frame)
         search_entry.grid(row=0, column=1, padx=5, pady=5)
-        ttk.Button(search_frame, text="Search", command=lambda: self.filter_dashboard(search_entry.get()), bootstyle="info").grid(row=0, column=2, padx=5, pady=5)
+        search_entry.bind("<Return>", lambda e: self.filter_dashboard(search_entry.get()))
+        ttk.Label(search_frame, text="Status:").grid(row=0, column=2, padx=5, pady=5)
+        self.dashboard_status_combo = ttk.Combobox(search_frame, values=["All"] + INVENTORY_STATUSES, state="readonly", width=12, bootstyle="primary")
+        self.dashboard_status_combo.set("All")
+        self.dashboard_status_combo.grid(row=0, column=3, padx=5, pady=5)
+        ttk.Label(search_frame, text="Warehouse:").grid(row=0, column=4, padx=5, pady=5)
+        self.dashboard_warehouse_combo = ttk.Combobox(search_frame, state="readonly", width=18, bootstyle="primary")
+        self.dashboard_warehouse_combo.set("All")
+        self.dashboard_warehouse_combo.grid(row=0, column=5, padx=5, pady=5)
+        for combo in (self.dashboard_status_combo, self.dashboard_warehouse_combo):
+            combo.bind("<<ComboboxSelected>>", lambda e: self.refresh_dashboard_grid())
+        ttk.Button(search_frame, text="Search", command=lambda: self.filter_dashboard(search_entry.get()), bootstyle="info").grid(row=0, column=6, padx=5, pady=5)
 
         # Summary
         summary_frame = ttk.LabelFrame(self.dashboard_frame, text="Summary", padding=10)
         summary_frame.grid(row=1, column=0, sticky="ew", padx=5, pady=5)
-        self.db.cursor.execute('SELECT COUNT(*) FROM products')
-        total_products = self.db.cursor.fetchone()[0]
-        self.db.cursor.execute('SELECT COUNT(*) FROM inventory WHERE quantity <= 10')
-        low_stock = self.db.cursor.fetchone()[0]
-        ttk.Label(summary_frame, text=f"Total Products: {total_products}").grid(row=0, column=0, padx=5, pady=5)
-        ttk.Label(summary_frame, text=f"Low Stock Items: {low_stock}", bootstyle="danger").grid(row=0, column=1, padx=5, pady=5)
+        self.total_products_label = ttk.Label(summary_frame, text="")
+        self.total_products_label.grid(row=0, column=0, padx=5, pady=5)
+        self.low_stock_label = ttk.Label(summary_frame, text="", bootstyle="danger")
+        self.low_stock_label.grid(row=0, column=1, padx=5, pady=5)
+        self.dashboard_totals_label = ttk.Label(summary_frame, text="", wraplength=900)
+        self.dashboard_totals_label.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="w")
 
         # Inventory table
         tree_frame = ttk.LabelFrame(self.dashboard_frame, text="Inventory", padding=10)
@@ -444,47 +443,156 @@ class InventoryApp:
         self.dashboard_frame.columnconfigure(0, weight=1)
         self.dashboard_frame.rowconfigure(2, weight=1)
 
-        tree = ttk.Treeview(tree_frame, columns=("Inventory ID", "Product ID", "Product", "Quantity", "Status", "Warehouse", "Zone", "Aisle", "Bin"), show="headings", bootstyle="primary")
-        tree.heading("Inventory ID", text="Inventory ID")
-        tree.heading("Product ID", text="Product ID")
-        tree.heading("Product", text="Product")
-        tree.heading("Quantity", text="Quantity")
-        tree.heading("Status", text="Status")
-        tree.heading("Warehouse", text="Warehouse")
-        tree.heading("Zone", text="Zone")
-        tree.heading("Aisle", text="Aisle")
-        tree.heading("Bin", text="Bin")
-        tree.column("Inventory ID", width=100)
-        tree.column("Product ID", width=100)
-        tree.column("Product", width=150)
-        tree.column("Quantity", width=80)
-        tree.column("Status", width=100)
-        tree.column("Warehouse", width=120)
-        tree.column("Zone", width=80)
-        tree.column("Aisle", width=80)
-        tree.column("Bin", width=80)
-
-        summary = self.db.get_inventory_summary()
-        for row in summary:
-            color = "success" if row[2] == "available" else "danger" if row[2] == "damaged" else "warning"
-            tree.insert("", "end", values=row, tags=(color,))
+        tree = ttk.Treeview(tree_frame, columns=SUMMARY_COLUMNS, show="headings", bootstyle="primary")
+        widths = {"Inventory ID": 100, "Product ID": 100, "Product": 150, "Quantity": 80, "Status": 100, "Warehouse": 120}
+        for col in SUMMARY_COLUMNS:
+            tree.heading(col, text=col, command=lambda c=col: self.sort_dashboard(c))
+            tree.column(col, width=widths.get(col, 80))
         tree.tag_configure("success", background="#d4edda")
         tree.tag_configure("danger", background="#f8d7da")
         tree.tag_configure("warning", background="#fff3cd")
         tree.pack(fill="both", expand=True)
+        self.dashboard_tree = tree
+        self.dashboard_count_label = ttk.Label(tree_frame, text="")
+        self.dashboard_count_label.pack(pady=2)
 
         ttk.Button(tree_frame, text="Refresh", command=self.update_dashboard, bootstyle="info").pack(pady=5)
+        self.refresh_dashboard_summary()
+        self.refresh_dashboard_grid()
+
+    def refresh_dashboard_summary(self):
+        self.db.cursor.execute('SELECT COUNT(*) FROM products')
+        total_products = self.db.cursor.fetchone()[0]
+        self.total_products_label.configure(text=f"Total Products: {total_products}")
+        self.low_stock_label.configure(text=f"Low Stock Items: {self.inventory_model.count_at_or_below(10)}")
+        warehouses = sorted(name for name in self.inventory_model.warehouses.values if name is not None)
+        self.dashboard_warehouse_combo.configure(values=["All"] + warehouses)
+
+    def create_locations_view(self):
+        # Drill-down of warehouse -> zone -> aisle -> bin with quantity rollups kept in memory
+        self.location_hierarchy = LocationHierarchy.load(self.db)
+        self.location_product = None
+
+        filter_frame = ttk.Frame(self.locations_frame)
+        filter_frame.grid(row=0, column=0, sticky="ew", padx=5, pady=5)
+        ttk.Label(filter_frame, text="Product:").grid(row=0, column=0, padx=5, pady=5)
+        product_combo = TypeAheadCombobox(filter_frame, self.product_index, bootstyle="primary")
+        product_combo.grid(row=0, column=1, padx=5, pady=5)
+        ToolTip(product_combo, text="Optional: show quantities of one product; leave empty for all products")
+
+        def apply_product():
+            if product_combo.get() and product_combo.get_id() is None:
+                messagebox.showerror("Error", "Invalid product selected")
+                return
+            self.location_product = product_combo.get_id()
+            self.update_location_tree()
+
+        ttk.Button(filter_frame, text="Show", command=apply_product, bootstyle="info").grid(row=0, column=2, padx=5, pady=5)
+        ttk.Label(filter_frame, text="Empty:").grid(row=0, column=3, padx=5, pady=5)
+        for column, level in enumerate(("zone", "aisle", "bin"), start=4):
+            ttk.Button(filter_frame, text=f"{level.title()}s", command=lambda l=level: self.show_empty_locations(l),
+                       bootstyle="warning-outline").grid(row=0, column=column, padx=2, pady=5)
+
+        tree = ttk.Treeview(self.locations_frame, columns=("Quantity", "Products"), show="tree headings", bootstyle="primary")
+        tree.heading("#0", text="Location")
+        tree.heading("Quantity", text="Quantity")
+        tree.heading("Products", text="Products")
+        tree.column("#0", width=300)
+        tree.tag_configure("empty", foreground="#999999")
+        tree.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        tree.bind("<<TreeviewOpen>>", lambda e: self.expand_location_node(tree.focus()))
+        self.locations_frame.columnconfigure(0, weight=1)
+        self.locations_frame.rowconfigure(1, weight=1)
+        self.location_tree = tree
+        self.zone_totals_label = ttk.Label(self.locations_frame, text="", wraplength=900)
+        self.zone_totals_label.grid(row=2, column=0, sticky="w", padx=5, pady=5)
+        self.fill_location_tree()
+
+    def location_node_values(self, node):
+        return node.quantity(self.location_product), len(node.products)
+
+    def insert_location_node(self, parent_iid, node):
+        iid = f"loc{len(self.location_tree_nodes)}"
+        self.location_tree_nodes[iid] = node
+        quantity, products = self.location_node_values(node)
+        self.location_tree.insert(parent_iid, "end", iid=iid, text=node.name if node.name is not None else "(none)",
+                                  values=(quantity, products), tags=("empty",) if not quantity else ())
+        if node.children:
+            # Placeholder so the node can be opened; children are inserted on first expand
+            self.location_tree.insert(iid, "end", iid=iid + "#")
+
+    def fill_location_tree(self):
+        tree = self.location_tree
+        tree.delete(*tree.get_children())
+        self.location_tree_nodes = {}
+        for node in self.location_hierarchy.warehouses():
+            self.insert_location_node("", node)
+        self.update_zone_totals()
+
+    def expand_location_node(self, iid):
+        if not self.location_tree.exists(iid + "#"):
+            return
+        self.location_tree.delete(iid + "#")
+        for child in self.location_tree_nodes[iid].sorted_children():
+            self.insert_location_node(iid, child)
+
+    def update_location_tree(self):
+        # Only the rows already shown are updated; each value is an O(1) rollup lookup
+        for iid, node in self.location_tree_nodes.items():
+            quantity, products = self.location_node_values(node)
+            self.location_tree.item(iid, values=(quantity, products), tags=("empty",) if not quantity else ())
+        self.update_zone_totals()
+
+    def update_zone_totals(self):
+        hierarchy = self.location_hierarchy
+        totals = sorted((str(name or "(none)"), hierarchy.quantity_by_name("zone", name, self.location_product))
+                        for name in hierarchy.by_name["zone"])
+        subject = self.product_index.labels.get(self.location_product, "all products") if self.location_product else "all products"
+        self.zone_totals_label.configure(
+            text=f"By zone across warehouses ({subject}): " + (" | ".join(f"{name}: {total}" for name, total in totals) or "none")
+        )
+
+    def show_empty_locations(self, level):
+        nodes = self.location_hierarchy.empty_nodes(level)
+        if not nodes:
+            messagebox.showinfo("Empty Locations", f"No empty {level}s")
+            return
+        lines = [" / ".join(str(part or "(none)") for part in node.path()) for node in nodes[:50]]
+        more = f"\n... and {len(nodes) - 50} more" if len(nodes) > 50 else ""
+        messagebox.showinfo("Empty Locations", f"{len(nodes)} empty {level}s:\n" + "\n".join(lines) + more)
 
     def filter_dashboard(self, search_term):
-        for widget in self.dashboard_frame.winfo_children():
-            widget.destroy()
-        self.update_dashboard()  # Rebuild dashboard
-        tree_frame = self.dashboard_frame.winfo_children()[-1]  # Last child is tree_frame
-        tree = tree_frame.winfo_children()[0]  # First child is Treeview
-        for item in tree.get_children():
-            values = tree.item(item, "values")
-            if not search_term.lower() in values[2].lower():  # Check product name
-                tree.delete(item)
+        self.dashboard_filter = search_term
+        self.refresh_dashboard_grid()
+
+    def sort_dashboard(self, column):
+        current, descending = self.dashboard_sort
+        self.dashboard_sort = (column, not descending if current == column else False)
+        self.refresh_dashboard_grid()
+
+    def refresh_dashboard_grid(self):
+        # Filter, sort and total against the columnar model; only the first DASHBOARD_ROW_LIMIT rows become Treeview items
+        model = self.inventory_model
+        status = self.dashboard_status_combo.get()
+        warehouse = self.dashboard_warehouse_combo.get()
+        positions = model.filter(self.dashboard_filter, None if status == "All" else status, None if warehouse == "All" else warehouse)
+        column, descending = self.dashboard_sort
+        if column:
+            positions = model.sort(positions, column, descending)
+
+        tree = self.dashboard_tree
+        tree.delete(*tree.get_children())
+        for i in positions[:DASHBOARD_ROW_LIMIT].tolist():
+            row = model.row(i)
+            color = "success" if row[4] == "available" else "danger" if row[4] == "damaged" else "warning"
+            tree.insert("", "end", values=row, tags=(color,))
+
+        shown = min(len(positions), DASHBOARD_ROW_LIMIT)
+        self.dashboard_count_label.configure(text=f"Showing {shown} of {len(positions)} matching rows ({len(model)} total)")
+        totals = sorted(model.totals_by("warehouses", positions), key=lambda item: str(item[0]))
+        self.dashboard_totals_label.configure(
+            text="Quantity by warehouse: " + (" | ".join(f"{name}: {total}" for name, total in totals) or "none")
+        )
 
     def create_add_product_form(self):
         form = ttk.LabelFrame(self.add_product_frame, text="Add Product", padding=10)
@@ -516,29 +624,28 @@ class InventoryApp:
         status_combo.set("available")
         ToolTip(status_combo, text="Select inventory status")
 
-        locations = self.db.get_locations()
-        if not locations:
+        location_combo = None
+        if not self.location_index:
             ttk.Label(form, text="No locations available. Add a warehouse and location first.", bootstyle="danger").grid(row=5, column=0, columnspan=2, pady=5)
         else:
             ttk.Label(form, text="Location:").grid(row=5, column=0, padx=5, pady=5, sticky="e")
-            location_combo = ttk.Combobox(form, values=[f"{loc[1]} (Zone: {loc[2]}, Aisle: {loc[3]}, Bin: {loc[4]})" for loc in locations], bootstyle="primary")
+            location_combo = TypeAheadCombobox(form, self.location_index, bootstyle="primary")
             location_combo.grid(row=5, column=1, padx=5, pady=5)
-            location_combo.set(locations[0][1] if locations else "")
-            ToolTip(location_combo, text="Select storage location")
+            ToolTip(location_combo, text="Type a warehouse, zone or bin to search locations")
 
         ttk.Button(form, text="Save", command=lambda: self.save_product(
             name_entry.get(), desc_entry.get(), cat_entry.get(),
-            quantity_entry.get(), status_combo.get(), location_combo.get() if locations else "", locations
+            quantity_entry.get(), status_combo.get(), location_combo
         ), bootstyle="success").grid(row=6, column=0, columnspan=2, pady=10)
 
-    def save_product(self, name, description, category, quantity, status, location_str, locations):
+    def save_product(self, name, description, category, quantity, status, location_combo):
         if not name:
             messagebox.showerror("Error", "Name is required")
             return
         if not quantity:
             messagebox.showerror("Error", "Quantity is required")
             return
-        if not locations:
+        if location_combo is None:
             messagebox.showerror("Error", "No locations available. Please add a warehouse and location first.")
             return
         try:
@@ -546,17 +653,15 @@ class InventoryApp:
             if quantity < 0:
                 raise ValueError("Quantity cannot be negative")
 
-            selected_location = next((loc for loc in locations if f"{loc[1]} (Zone: {loc[2]}, Aisle: {loc[3]}, Bin: {loc[4]})" == location_str), None)
-            if not selected_location:
+            location_id = location_combo.get_id()
+            if location_id is None:
                 messagebox.showerror("Error", "Invalid location selected")
                 return
-            location_id = selected_location[0]
 
-            self.db.add_product(name, description, category)
-            self.db.cursor.execute("SELECT LAST_INSERT_ID()")
-            product_id = self.db.cursor.fetchone()[0]
+            product_id = self.db.add_product(name, description, category)
             self.db.add_inventory(product_id, location_id, quantity, status)
             messagebox.showinfo("Success", "Product and inventory record added")
+            self.load_picker_indexes()
             self.update_dashboard()
         except (ValueError, mysql.connector.Error) as e:
             messagebox.showerror("Error", f"Invalid input: {str(e)}")
@@ -635,6 +740,7 @@ class InventoryApp:
         try:
             self.db.add_location(warehouse_id, zone, aisle, bin)
             messagebox.showinfo("Success", "Location added")
+            self.load_picker_indexes()
             self.create_add_location_form()
             self.create_add_product_form()
         except mysql.connector.Error as e:
@@ -644,27 +750,25 @@ class InventoryApp:
         form = ttk.LabelFrame(self.stock_movement_frame, text="Stock Movement", padding=10)
         form.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
 
-        products = self.db.get_products()
         ttk.Label(form, text="Product:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
-        product_combo = ttk.Combobox(form, values=[f"{p[1]} (ID: {p[0]})" for p in products], bootstyle="primary")
+        product_combo = TypeAheadCombobox(form, self.product_index, bootstyle="primary")
         product_combo.grid(row=0, column=1, padx=5, pady=5)
-        product_combo.set(products[0][1] if products else "")
-        ToolTip(product_combo, text="Select product")
+        ToolTip(product_combo, text="Type a product name or ID to search")
 
         ttk.Label(form, text="Quantity:").grid(row=1, column=0, padx=5, pady=5, sticky="e")
         quantity_entry = ttk.Entry(form)
         quantity_entry.grid(row=1, column=1, padx=5, pady=5)
         ToolTip(quantity_entry, text="Enter quantity (required, non-negative)")
 
-        ttk.Label(form, text="From Location ID:").grid(row=2, column=0, padx=5, pady=5, sticky="e")
-        from_loc_entry = ttk.Entry(form)
-        from_loc_entry.grid(row=2, column=1, padx=5, pady=5)
-        ToolTip(from_loc_entry, text="Enter source location ID (optional)")
+        ttk.Label(form, text="From Location:").grid(row=2, column=0, padx=5, pady=5, sticky="e")
+        from_loc_combo = TypeAheadCombobox(form, self.location_index, bootstyle="primary")
+        from_loc_combo.grid(row=2, column=1, padx=5, pady=5)
+        ToolTip(from_loc_combo, text="Type to search source location (optional)")
 
-        ttk.Label(form, text="To Location ID:").grid(row=3, column=0, padx=5, pady=5, sticky="e")
-        to_loc_entry = ttk.Entry(form)
-        to_loc_entry.grid(row=3, column=1, padx=5, pady=5)
-        ToolTip(to_loc_entry, text="Enter destination location ID (optional)")
+        ttk.Label(form, text="To Location:").grid(row=3, column=0, padx=5, pady=5, sticky="e")
+        to_loc_combo = TypeAheadCombobox(form, self.location_index, bootstyle="primary")
+        to_loc_combo.grid(row=3, column=1, padx=5, pady=5)
+        ToolTip(to_loc_combo, text="Type to search destination location (optional)")
 
         ttk.Label(form, text="Movement Type:").grid(row=4, column=0, padx=5, pady=5, sticky="e")
         movement_type = ttk.Combobox(form, values=["transfer", "sale", "return", "restock"], bootstyle="primary")
@@ -672,45 +776,244 @@ class InventoryApp:
         ToolTip(movement_type, text="Select movement type")
 
         ttk.Button(form, text="Save", command=lambda: self.save_movement(
-            product_combo.get(), quantity_entry.get(), from_loc_entry.get(), to_loc_entry.get(), movement_type.get(), products
+            product_combo, quantity_entry.get(), from_loc_combo, to_loc_combo, movement_type.get()
         ), bootstyle="success").grid(row=5, column=0, columnspan=2, pady=10)
 
-    def save_movement(self, product_str, quantity, from_loc, to_loc, movement_type, products):
-        if not product_str or not quantity or not movement_type:
+    def save_movement(self, product_combo, quantity, from_loc_combo, to_loc_combo, movement_type):
+        if not product_combo.get() or not quantity or not movement_type:
             messagebox.showerror("Error", "Product, quantity, and movement type are required")
             return
         try:
-            selected_product = next((p for p in products if f"{p[1]} (ID: {p[0]})" == product_str), None)
-            if not selected_product:
+            product_id = product_combo.get_id()
+            if product_id is None:
                 messagebox.showerror("Error", "Invalid product selected")
                 return
-            product_id = selected_product[0]
             quantity = int(quantity)
             if quantity < 0:
                 raise ValueError("Quantity cannot be negative")
-            from_loc = int(from_loc) if from_loc else None
-            to_loc = int(to_loc) if to_loc else None
-            self.db.log_movement(product_id, quantity, from_loc, to_loc, movement_type)
-            if movement_type == "sale":
-                self.db.cursor.execute('UPDATE inventory SET quantity = quantity - %s WHERE product_id = %s', (quantity, product_id))
-            elif movement_type == "restock":
-                self.db.cursor.execute('UPDATE inventory SET quantity = quantity + %s WHERE product_id = %s', (quantity, product_id))
-            self.db.conn.commit()
-            messagebox.showinfo("Success", "Movement recorded")
+            from_loc = from_loc_combo.get_id()
+            to_loc = to_loc_combo.get_id()
+            if (from_loc_combo.get() and from_loc is None) or (to_loc_combo.get() and to_loc is None):
+                messagebox.showerror("Error", "Invalid location selected")
+                return
+            if movement_type in ("sale", "transfer"):
+                picks = self.allocate_stock(product_id, quantity, from_loc, to_loc, movement_type)
+                messagebox.showinfo("Success", "Movement recorded\n" + "\n".join(
+                    f"{qty} from {'batch ' + str(batch_id) if batch_id else 'unbatched stock'} at location {loc}"
+                    for _, batch_id, loc, qty in picks))
+            else:
+                self.db.record_movements([(product_id, quantity, from_loc, to_loc, movement_type)])
+                messagebox.showinfo("Success", "Movement recorded")
             self.update_dashboard()
         except (ValueError, mysql.connector.Error) as e:
             messagebox.showerror("Error", f"Invalid input: {e}")
 
+    def allocate_stock(self, product_id, quantity, from_loc, to_loc, movement_type):
+        # Sales and transfers pick stock earliest-expiry first. The allocator stays loaded between
+        # movements; stock changed by other users is re-read only where it changed.
+        if self.allocator is None:
+            self.allocator = StockAllocator.load(self.db)
+        else:
+            self.allocator = self.allocator.refresh(self.db)
+        picks = self.allocator.allocate([(product_id, quantity, from_loc)])
+        try:
+            versions = self.db.record_allocations(picks, movement_type, to_loc)
+        except (ValueError, mysql.connector.Error):
+            self.allocator.release(picks)
+            raise
+        self.allocator.advance(versions)
+        if movement_type == "transfer":
+            self.allocator.receive(picks, to_loc)
+        return picks
+
+    def create_scan_form(self):
+        self.scan_session = ScanSession()
+        form = ttk.LabelFrame(self.scan_frame, text="Barcode Scan", padding=10)
+        form.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        self.scan_frame.columnconfigure(0, weight=1)
+        self.scan_frame.rowconfigure(0, weight=1)
+
+        ttk.Label(form, text="Mode:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+        modes = {"Receive (restock)": "restock", "Pick (sale)": "sale", "Return": "return", "Count (cycle count)": COUNT_MODE}
+        mode_combo = ttk.Combobox(form, values=list(modes), state="readonly", bootstyle="primary")
+        mode_combo.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        mode_combo.set("Receive (restock)")
+        mode_combo.bind("<<ComboboxSelected>>", lambda e: setattr(self.scan_session, "movement_type", modes[mode_combo.get()]))
+        ToolTip(mode_combo, text="Movement type recorded for the following scans")
+
+        ttk.Label(form, text="Scan:").grid(row=1, column=0, padx=5, pady=5, sticky="e")
+        scan_entry = ttk.Entry(form, width=40)
+        scan_entry.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        scan_entry.bind("<Return>", lambda e: self.on_scan(scan_entry))
+        scan_entry.focus_set()
+        ToolTip(scan_entry, text="Scan L<id> for a location, then product barcodes (<id> or <qty>*<id>)")
+
+        self.scan_location_label = ttk.Label(form, text="Location: scan a location barcode", bootstyle="warning")
+        self.scan_location_label.grid(row=2, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        self.scan_tally_label = ttk.Label(form, text="")
+        self.scan_tally_label.grid(row=3, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+
+        self.scan_tree = ttk.Treeview(form, columns=("Type", "Product", "Location", "Quantity"), show="headings", bootstyle="primary", height=12)
+        for col in ("Type", "Product", "Location", "Quantity"):
+            self.scan_tree.heading(col, text=col)
+        self.scan_tree.column("Quantity", width=80)
+        self.scan_tree.tag_configure("rejected", foreground="red")
+        self.scan_tree.grid(row=4, column=0, columnspan=2, sticky="nsew", padx=5, pady=5)
+        form.columnconfigure(1, weight=1)
+        form.rowconfigure(4, weight=1)
+
+        button_frame = ttk.Frame(form)
+        button_frame.grid(row=5, column=0, columnspan=2, pady=5)
+        ttk.Button(button_frame, text="Undo Last Scan", command=self.undo_scan, bootstyle="warning").grid(row=0, column=0, padx=5)
+        ttk.Button(button_frame, text="Post Now", command=self.flush_scans, bootstyle="success").grid(row=0, column=1, padx=5)
+        ttk.Button(button_frame, text="Clear Rejected", command=self.clear_rejected_scans, bootstyle="danger").grid(row=0, column=2, padx=5)
+
+        self.update_scan_tally()
+        self.root.after(SCAN_FLUSH_INTERVAL_MS, self.scan_timer)
+
+    def on_scan(self, scan_entry):
+        # Runs once per barcode; only touches in-memory state so scanning never waits on the database
+        code = scan_entry.get()
+        scan_entry.delete(0, "end")
+        if not code.strip():
+            return
+        try:
+            kind, entry_id, quantity = parse_barcode(code)
+            if kind == "location":
+                if entry_id not in self.location_index.labels:
+                    raise ValueError(f"Unknown location {entry_id}")
+                self.scan_session.location_id = entry_id
+                self.scan_location_label.configure(text=f"Location: {self.location_index.labels[entry_id]}", bootstyle="success")
+                return
+            if entry_id not in self.product_index.labels:
+                raise ValueError(f"Unknown product {entry_id}")
+            key, total = self.scan_session.scan(entry_id, quantity)
+            self.show_scan_line(key, total)
+        except ValueError as e:
+            self.root.bell()
+            self.scan_tally_label.configure(text=str(e), bootstyle="danger")
+            return
+        self.update_scan_tally()
+
+    def show_scan_line(self, key, total):
+        iid = "-".join(str(part) for part in key)
+        if not total:
+            if self.scan_tree.exists(iid):
+                self.scan_tree.delete(iid)
+            return
+        movement_type, product_id, location_id = key
+        values = (movement_type, self.product_index.labels.get(product_id, product_id),
+                  self.location_index.labels.get(location_id, location_id), total)
+        if self.scan_tree.exists(iid):
+            self.scan_tree.item(iid, values=values)
+        else:
+            self.scan_tree.insert("", 0, iid=iid, values=values)
+
+    def show_rejected_line(self, key, total, message):
+        # Refused lines stay listed (in red) until cleared; they are not posted again
+        iid = "-".join(str(part) for part in key) + "-rejected"
+        movement_type, product_id, location_id = key
+        values = (f"{movement_type} (rejected: {message})", self.product_index.labels.get(product_id, product_id),
+                  self.location_index.labels.get(location_id, location_id), total)
+        if self.scan_tree.exists(iid):
+            self.scan_tree.item(iid, values=values)
+        else:
+            self.scan_tree.insert("", 0, iid=iid, values=values, tags=("rejected",))
+
+    def clear_rejected_scans(self):
+        for key in self.scan_session.clear_rejected():
+            iid = "-".join(str(part) for part in key) + "-rejected"
+            if self.scan_tree.exists(iid):
+                self.scan_tree.delete(iid)
+        self.update_scan_tally()
+
+    def undo_scan(self):
+        undone = self.scan_session.undo()
+        if undone is None:
+            messagebox.showinfo("Undo", "No pending scan to undo")
+            return
+        self.show_scan_line(*undone)
+        self.update_scan_tally()
+
+    def update_scan_tally(self):
+        session = self.scan_session
+        self.scan_tally_label.configure(
+            text=f"Scans: {session.scans}   Pending units: {session.pending_units} ({len(session.lines)} lines)   Posted units: {session.posted_units}"
+                 + (f"   Rejected lines: {len(session.rejected)}" if session.rejected else ""),
+            bootstyle="default"
+        )
+
+    def scan_timer(self):
+        if not self.scan_frame.winfo_exists():
+            return
+        self.collect_scan_results()
+        self.flush_scans()
+        self.root.after(SCAN_FLUSH_INTERVAL_MS, self.scan_timer)
+
+    def flush_scans(self):
+        # One flush in flight at a time, on a worker thread with its own connection
+        if self.scan_flushing or not self.scan_session.lines:
+            return
+        lines = self.scan_session.drain()
+        if not lines:
+            return
+        self.scan_flushing = True
+
+        def post():
+            try:
+                with self.worker_pool.connection() as db:
+                    self.scan_results.put((lines,) + post_lines(db, lines))
+            except Exception as e:
+                self.scan_results.put((lines, {}, [], e))
+
+        self.scan_flush_thread = threading.Thread(target=post, daemon=True)
+        self.scan_flush_thread.start()
+        self.root.after(50, self.collect_scan_results)
+
+    def collect_scan_results(self):
+        try:
+            lines, posted, rejected, error = self.scan_results.get_nowait()
+        except queue.Empty:
+            if self.scan_flushing:
+                self.root.after(50, self.collect_scan_results)
+            return
+        self.scan_flushing = False
+        self.scan_session.mark_posted(posted)
+        for key, quantity, message in rejected:
+            logging.error(f"Scan line {key} x{quantity} rejected: {message}")
+            self.show_rejected_line(key, self.scan_session.reject(key, quantity, message), message)
+        self.restore_unposted(lines, posted, rejected)
+        for key in lines:
+            self.show_scan_line(key, self.scan_session.lines.get(key, 0))
+        self.update_scan_tally()
+        if error:
+            logging.error(f"Error posting scans: {error}")
+            self.scan_tally_label.configure(text=f"Posting failed, scans kept pending: {error}", bootstyle="danger")
+            if not self.scan_error_shown:
+                self.scan_error_shown = True
+                messagebox.showerror("Error", f"Failed to post scans, they are kept pending and retried: {error}")
+        else:
+            self.scan_error_shown = False
+        if rejected:
+            messagebox.showerror("Scans Rejected", "These scan lines were not posted and will not be retried:\n"
+                                 + "\n".join(f"{key[0]} product {key[1]} at location {key[2]} x{quantity}: {message}"
+                                             for key, quantity, message in rejected))
+
+    def restore_unposted(self, lines, posted, rejected):
+        # Lines neither posted nor refused failed for another reason (e.g. the connection); retried next flush
+        refused = {key for key, _, _ in rejected}
+        unsent = [(key, quantity) for key, quantity in lines.items() if key not in posted and key not in refused]
+        if unsent:
+            self.scan_session.restore(unsent)
+
     def create_add_serial_batch_form(self):
         form = ttk.LabelFrame(self.serial_batch_frame, text="Add Serial/Batch", padding=10)
         form.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
 
-        products = self.db.get_products()
         ttk.Label(form, text="Product:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
-        product_combo = ttk.Combobox(form, values=[f"{p[1]} (ID: {p[0]})" for p in products], bootstyle="primary")
+        product_combo = TypeAheadCombobox(form, self.product_index, bootstyle="primary")
         product_combo.grid(row=0, column=1, padx=5, pady=5)
-        product_combo.set(products[0][1] if products else "")
-        ToolTip(product_combo, text="Select product")
+        ToolTip(product_combo, text="Type a product name or ID to search")
 
         ttk.Label(form, text="Serial/Batch Number:").grid(row=1, column=0, padx=5, pady=5, sticky="e")
         number_entry = ttk.Entry(form)
@@ -732,27 +1035,48 @@ class InventoryApp:
         received_entry.grid(row=4, column=1, padx=5, pady=5)
         ToolTip(received_entry, text="Enter received date (e.g., 2025-05-26)")
 
+        ttk.Label(form, text="Received At:").grid(row=5, column=0, padx=5, pady=5, sticky="e")
+        location_combo = TypeAheadCombobox(form, self.location_index, bootstyle="primary")
+        location_combo.grid(row=5, column=1, padx=5, pady=5)
+        ToolTip(location_combo, text="Optional: location the batch was put away at")
+
+        ttk.Label(form, text="Quantity Received:").grid(row=6, column=0, padx=5, pady=5, sticky="e")
+        quantity_entry = ttk.Entry(form)
+        quantity_entry.grid(row=6, column=1, padx=5, pady=5)
+        ToolTip(quantity_entry, text="Optional: units received; added to inventory at the location")
+
         ttk.Button(form, text="Save", command=lambda: self.save_serial_batch(
-            product_combo.get(), number_entry.get(), type_combo.get(), expiry_entry.get(), received_entry.get(), products
-        ), bootstyle="success").grid(row=5, column=0, columnspan=2, pady=10)
+            product_combo, number_entry.get(), type_combo.get(), expiry_entry.get(), received_entry.get(),
+            location_combo, quantity_entry.get()
+        ), bootstyle="success").grid(row=7, column=0, columnspan=2, pady=10)
 
-    def save_serial_batch(self, product_str, number, type, expiry_date, received_date, products):
-        if not product_str or not number or not type:
+    def save_serial_batch(self, product_combo, number, type, expiry_date, received_date, location_combo, quantity):
+        if not product_combo.get() or not number or not type:
             messagebox.showerror("Error", "Product, serial/batch number, and type are required")
             return
         try:
-            selected_product = next((p for p in products if f"{p[1]} (ID: {p[0]})" == product_str), None)
-            if not selected_product:
+            product_id = product_combo.get_id()
+            if product_id is None:
                 messagebox.showerror("Error", "Invalid product selected")
                 return
-            product_id = selected_product[0]
             # Validate date format
             if expiry_date:
                 datetime.strptime(expiry_date, '%Y-%m-%d')
             if received_date:
                 datetime.strptime(received_date, '%Y-%m-%d')
-            self.db.add_serial_batch(product_id, number, type, expiry_date or None, received_date or None)
+            location_id = location_combo.get_id()
+            if location_combo.get() and location_id is None:
+                messagebox.showerror("Error", "Invalid location selected")
+                return
+            quantity = int(quantity) if quantity else 0
+            if quantity < 0:
+                raise ValueError("Quantity cannot be negative")
+            if quantity and location_id is None:
+                raise ValueError("Select the location the quantity was received at")
+            self.db.add_serial_batch(product_id, number, type, expiry_date or None, received_date or None, location_id, quantity)
             messagebox.showinfo("Success", "Serial/Batch added")
+            if quantity:
+                self.update_dashboard()
         except (ValueError, mysql.connector.Error) as e:
             messagebox.showerror("Error", f"Invalid input: {str(e)}")
 
@@ -790,16 +1114,128 @@ class InventoryApp:
         except (ValueError, mysql.connector.Error) as e:
             messagebox.showerror("Error", f"Invalid input: {str(e)}")
 
+    def create_cycle_count_form(self):
+        form = ttk.LabelFrame(self.adjust_inventory_frame, text="Cycle Count", padding=10)
+        form.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        self.adjust_inventory_frame.columnconfigure(0, weight=1)
+        self.adjust_inventory_frame.rowconfigure(1, weight=1)
+        self.cycle_count = None
+
+        ttk.Label(form, text="Warehouse:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+        warehouses = {f"{w[1]} ({w[2]})": w[0] for w in self.db.get_warehouses()}
+        warehouse_combo = ttk.Combobox(form, values=list(warehouses), state="readonly", bootstyle="primary")
+        warehouse_combo.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        ToolTip(warehouse_combo, text="Warehouse that was counted")
+        ttk.Label(form, text="Zone:").grid(row=0, column=2, padx=5, pady=5, sticky="e")
+        zone_entry = ttk.Entry(form, width=15)
+        zone_entry.grid(row=0, column=3, padx=5, pady=5, sticky="w")
+        ToolTip(zone_entry, text="Optional: counted zone; leave empty for the whole warehouse")
+
+        def scope():
+            if warehouse_combo.get() not in warehouses:
+                raise ValueError("Select the counted warehouse")
+            return warehouses[warehouse_combo.get()], zone_entry.get().strip() or None
+
+        button_frame = ttk.Frame(form)
+        button_frame.grid(row=1, column=0, columnspan=4, pady=5, sticky="w")
+        ttk.Button(button_frame, text="Load Counts File...", bootstyle="info",
+                   command=lambda: self.load_cycle_count(scope, "file")).grid(row=0, column=0, padx=5)
+        if self.scan_session is not None:
+            ttk.Button(button_frame, text="Use Scanned Counts", bootstyle="info",
+                       command=lambda: self.load_cycle_count(scope, "scan")).grid(row=0, column=1, padx=5)
+
+        columns = ("Product", "Location", "System", "Counted", "Variance")
+        self.cycle_count_tree = ttk.Treeview(form, columns=columns, show="headings", bootstyle="primary", height=12)
+        for col in columns:
+            self.cycle_count_tree.heading(col, text=col)
+            self.cycle_count_tree.column(col, width=200 if col in ("Product", "Location") else 80)
+        self.cycle_count_tree.tag_configure("danger", background="#f8d7da")
+        self.cycle_count_tree.tag_configure("success", background="#d4edda")
+        self.cycle_count_tree.grid(row=2, column=0, columnspan=4, sticky="nsew", padx=5, pady=5)
+        form.columnconfigure(3, weight=1)
+        form.rowconfigure(2, weight=1)
+        self.cycle_count_label = ttk.Label(form, text="Load counted quantities to compare them with inventory")
+        self.cycle_count_label.grid(row=3, column=0, columnspan=4, padx=5, pady=5, sticky="w")
+
+        ttk.Label(form, text="Reason:").grid(row=4, column=0, padx=5, pady=5, sticky="e")
+        reason_entry = ttk.Entry(form, width=40)
+        reason_entry.insert(0, "Cycle count")
+        reason_entry.grid(row=4, column=1, columnspan=2, padx=5, pady=5, sticky="w")
+        ttk.Button(form, text="Approve & Apply", bootstyle="success",
+                   command=lambda: self.apply_cycle_count(reason_entry.get())).grid(row=4, column=3, padx=5, pady=5, sticky="w")
+
+    def load_cycle_count(self, scope, source):
+        try:
+            warehouse_id, zone = scope()
+            if source == "file":
+                path = filedialog.askopenfilename(title="Counted quantities (product_id, location_id, counted_quantity)",
+                                                  filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+                if not path:
+                    return
+                with open(path, newline="") as f:
+                    counts = [(row["product_id"], row["location_id"], row["counted_quantity"]) for row in csv.DictReader(f)]
+            else:
+                counts = self.scan_session.counts()
+                if not counts:
+                    messagebox.showinfo("Cycle Count", "No counts scanned; use the Scan tab in Count mode")
+                    return
+            count_id = self.db.create_cycle_count(counts, warehouse_id, zone, self.current_user)
+            if source != "file":
+                # Scanned counts are cleared only once they are stored, so a failed load keeps them
+                self.scan_session.take_counts()
+                self.scan_tree.delete(*[iid for iid in self.scan_tree.get_children() if iid.startswith(f"{COUNT_MODE}-")])
+                self.update_scan_tally()
+            variances = self.db.get_cycle_count_variances(count_id)
+        except (OSError, KeyError, ValueError, mysql.connector.Error) as e:
+            messagebox.showerror("Error", f"Failed to load counts: {e}")
+            return
+        self.cycle_count = (count_id, variances, len(counts))
+        self.show_cycle_count_variances()
+
+    def show_cycle_count_variances(self):
+        count_id, variances, counted_lines = self.cycle_count
+        tree = self.cycle_count_tree
+        tree.delete(*tree.get_children())
+        for _, product_id, location_id, system, counted, variance, _ in variances:
+            tree.insert("", "end", values=(self.product_index.labels.get(product_id, product_id),
+                                           self.location_index.labels.get(location_id, location_id),
+                                           system, counted, f"{variance:+d}"),
+                        tags=("danger" if variance < 0 else "success",))
+        net = sum(v[5] for v in variances)
+        self.cycle_count_label.configure(
+            text=f"Count {count_id}: {counted_lines} counted lines, {len(variances)} variances, net {net:+d} units")
+
+    def apply_cycle_count(self, reason):
+        if not self.cycle_count:
+            messagebox.showerror("Error", "Load counts first")
+            return
+        count_id, variances, counted_lines = self.cycle_count
+        if not messagebox.askyesno("Confirm", f"Apply {len(variances)} corrections from count {count_id}?"):
+            return
+        try:
+            applied = self.db.apply_cycle_count(count_id, variances, self.current_user, reason or "Cycle count")
+        except ConcurrentUpdateError as e:
+            # Stock moved while the count was reviewed: show fresh variances for another review
+            self.cycle_count = (count_id, self.db.get_cycle_count_variances(count_id), counted_lines)
+            self.show_cycle_count_variances()
+            messagebox.showwarning("Changed", f"{e}. The variances were recomputed; review and apply again.")
+            return
+        except (ValueError, mysql.connector.Error) as e:
+            messagebox.showerror("Error", f"Failed to apply count: {e}")
+            return
+        self.cycle_count = None
+        self.cycle_count_tree.delete(*self.cycle_count_tree.get_children())
+        self.cycle_count_label.configure(text=f"Count {count_id} applied: {applied} corrections")
+        self.update_dashboard()
+
     def create_set_reorder_rules_form(self):
         form = ttk.LabelFrame(self.reorder_rules_frame, text="Set Reorder Rules", padding=10)
         form.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
 
-        products = self.db.get_products()
         ttk.Label(form, text="Product:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
-        product_combo = ttk.Combobox(form, values=[f"{p[1]} (ID: {p[0]})" for p in products], bootstyle="primary")
+        product_combo = TypeAheadCombobox(form, self.product_index, bootstyle="primary")
         product_combo.grid(row=0, column=1, padx=5, pady=5)
-        product_combo.set(products[0][1] if products else "")
-        ToolTip(product_combo, text="Select product")
+        ToolTip(product_combo, text="Type a product name or ID to search")
 
         ttk.Label(form, text="Min Threshold:").grid(row=1, column=0, padx=5, pady=5, sticky="e")
         min_entry = ttk.Entry(form)
@@ -817,19 +1253,154 @@ class InventoryApp:
         ToolTip(ttk.Checkbutton(form, variable=auto_var), text="Enable automatic reordering")
 
         ttk.Button(form, text="Save", command=lambda: self.save_reorder_rule(
-            product_combo.get(), min_entry.get(), reorder_entry.get(), auto_var.get(), products
+            product_combo, min_entry.get(), reorder_entry.get(), auto_var.get()
         ), bootstyle="success").grid(row=4, column=0, columnspan=2, pady=10)
 
-    def save_reorder_rule(self, product_str, min_threshold, reorder_point, auto_order, products):
-        if not product_str or not min_threshold or not reorder_point:
+        self.create_reorder_suggestions_form()
+
+    def create_reorder_suggestions_form(self):
+        form = ttk.LabelFrame(self.reorder_rules_frame, text="Suggested Rules from Demand History", padding=10)
+        form.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        self.reorder_rules_frame.columnconfigure(0, weight=1)
+        self.reorder_rules_frame.rowconfigure(1, weight=1)
+
+        ttk.Label(form, text="History (days):").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+        history_entry = ttk.Entry(form, width=8)
+        history_entry.insert(0, "90")
+        history_entry.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        ToolTip(history_entry, text="Days of sales history used to estimate demand")
+
+        ttk.Label(form, text="Lead Time (days):").grid(row=0, column=2, padx=5, pady=5, sticky="e")
+        lead_entry = ttk.Entry(form, width=8)
+        lead_entry.insert(0, "7")
+        lead_entry.grid(row=0, column=3, padx=5, pady=5, sticky="w")
+        ToolTip(lead_entry, text="Days between placing and receiving an order")
+
+        ttk.Label(form, text="Service Level:").grid(row=0, column=4, padx=5, pady=5, sticky="e")
+        level_combo = ttk.Combobox(form, values=["0.9", "0.95", "0.98", "0.99"], width=6, state="readonly", bootstyle="primary")
+        level_combo.set("0.95")
+        level_combo.grid(row=0, column=5, padx=5, pady=5, sticky="w")
+        ToolTip(level_combo, text="Probability of not running out during the lead time")
+
+        columns = ("Product ID", "Product", "Daily Demand", "Std Dev", "Safety Stock", "Current Min", "Current Reorder", "Suggested Min/Reorder")
+        tree = ttk.Treeview(form, columns=columns, show="headings", bootstyle="primary", height=10)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=150 if col == "Product" else 100)
+        tree.grid(row=2, column=0, columnspan=7, sticky="nsew", padx=5, pady=5)
+        form.columnconfigure(6, weight=1)
+        form.rowconfigure(2, weight=1)
+        status_label = ttk.Label(form, text="")
+        status_label.grid(row=1, column=0, columnspan=7, padx=5, sticky="w")
+
+        apply_button = ttk.Button(form, text="Apply All Suggestions", bootstyle="success", state="disabled")
+        apply_button.grid(row=3, column=0, columnspan=7, pady=5)
+        compute_button = ttk.Button(form, text="Compute", bootstyle="info")
+        compute_button.grid(row=0, column=6, padx=5, pady=5, sticky="w")
+        compute_button.configure(command=lambda: self.compute_reorder_suggestions(
+            history_entry.get(), lead_entry.get(), level_combo.get(), tree, status_label, compute_button, apply_button
+        ))
+
+    def run_in_background(self, job, on_done):
+        # Runs job(db) on a worker thread with its own connection and hands (result, error) to on_done on the UI thread
+        results = queue.Queue()
+
+        def run():
+            try:
+                db = DatabaseManager(**self.db.connection_args, ensure_schema=False)
+                try:
+                    results.put((job(db), None))
+                finally:
+                    db.close()
+            except Exception as e:
+                results.put((None, e))
+
+        def poll():
+            try:
+                result, error = results.get_nowait()
+            except queue.Empty:
+                self.root.after(100, poll)
+                return
+            on_done(result, error)
+
+        threading.Thread(target=run, daemon=True).start()
+        self.root.after(100, poll)
+
+    def compute_reorder_suggestions(self, history_days, lead_time_days, service_level, tree, status_label, compute_button, apply_button):
+        try:
+            history_days = int(history_days)
+            lead_time_days = int(lead_time_days)
+            service_level = float(service_level)
+        except ValueError:
+            messagebox.showerror("Error", "History and lead time must be whole numbers of days")
+            return
+
+        def job(db):
+            suggestions = compute_reorder_suggestions(db, history_days, lead_time_days, service_level).with_demand()
+            return suggestions, db.get_reorder_rules()
+
+        def done(result, error):
+            compute_button.configure(state="normal")
+            if error:
+                status_label.configure(text="", bootstyle="default")
+                logging.error(f"Error computing reorder suggestions: {error}")
+                messagebox.showerror("Error", f"Failed to compute suggestions: {error}")
+                return
+            suggestions, current = result
+            self.show_reorder_suggestions(suggestions, current, tree)
+            status_label.configure(
+                text=f"{len(suggestions)} products with sales in the last {history_days} days"
+                     f" (showing up to {REVIEW_ROW_LIMIT} largest changes)",
+                bootstyle="info"
+            )
+            apply_button.configure(state="normal" if len(suggestions) else "disabled",
+                                   command=lambda: self.apply_reorder_suggestions(suggestions, apply_button, status_label))
+
+        compute_button.configure(state="disabled")
+        apply_button.configure(state="disabled")
+        status_label.configure(text="Computing...", bootstyle="info")
+        self.run_in_background(job, done)
+
+    def show_reorder_suggestions(self, suggestions, current, tree):
+        tree.delete(*tree.get_children())
+        current_reorder = [current.get(product_id, (None, 0))[1] or 0 for product_id in suggestions.product_ids.tolist()]
+        changes = [abs(suggested - existing) for suggested, existing in zip(suggestions.reorder_point.tolist(), current_reorder)]
+        order = sorted(range(len(suggestions)), key=changes.__getitem__, reverse=True)[:REVIEW_ROW_LIMIT]
+        for i in order:
+            product_id = int(suggestions.product_ids[i])
+            existing = current.get(product_id, ("", ""))
+            tree.insert("", "end", values=(
+                product_id, self.product_index.labels.get(product_id, ""),
+                f"{suggestions.demand_rate[i]:.2f}", f"{suggestions.demand_std[i]:.2f}", int(suggestions.safety_stock[i]),
+                existing[0], existing[1], int(suggestions.reorder_point[i])
+            ))
+
+    def apply_reorder_suggestions(self, suggestions, apply_button, status_label):
+        if not messagebox.askyesno("Confirm", f"Write suggested rules for {len(suggestions)} products?"):
+            return
+        rules = suggestions.rules()
+
+        def done(result, error):
+            if error:
+                apply_button.configure(state="normal")
+                logging.error(f"Error applying reorder suggestions: {error}")
+                messagebox.showerror("Error", f"Failed to apply suggestions: {error}")
+                return
+            status_label.configure(text=f"Applied {len(rules)} reorder rules", bootstyle="success")
+            messagebox.showinfo("Success", f"Reorder rules set for {len(rules)} products")
+
+        apply_button.configure(state="disabled")
+        self.run_in_background(lambda db: db.set_reorder_rules(rules), done)
+
+    def save_reorder_rule(self, product_combo, min_threshold, reorder_point, auto_order):
+        if not product_combo.get() or not min_threshold or not reorder_point:
             messagebox.showerror("Error", "Product, min threshold, and reorder point are required")
             return
         try:
-            selected_product = next((p for p in products if f"{p[1]} (ID: {p[0]})" == product_str), None)
-            if not selected_product:
+            product_id = product_combo.get_id()
+            if product_id is None:
                 messagebox.showerror("Error", "Invalid product selected")
                 return
-            product_id = selected_product[0]
             min_threshold = int(min_threshold)
             reorder_point = int(reorder_point)
             self.db.set_reorder_rule(product_id, min_threshold, reorder_point, auto_order)
@@ -847,97 +1418,191 @@ class InventoryApp:
         ttk.Button(form, text="Stock Movements", command=self.stock_movements_report, bootstyle="info").grid(row=0, column=4, padx=5, pady=5)
         if self.role == "Admin":
             ttk.Button(form, text="Audit Logs", command=self.audit_logs_report, bootstyle="info").grid(row=0, column=3, padx=5, pady=5)
+        ttk.Button(form, text="Export Bundle...", command=self.open_export_bundle_dialog, bootstyle="success").grid(row=0, column=5, padx=5, pady=5)
 
         self.report_display = ttk.Frame(form)
         self.report_display.grid(row=1, column=0, columnspan=4, sticky="nsew", pady=10)
 
-    def inventory_summary_report(self):
+    def open_export_bundle_dialog(self):
+        reports = {
+            "inventory_summary": "Inventory Summary",
+            "expiry_alerts": "Expiry Alerts",
+            "reorder_alerts": "Reorder Alerts",
+            "stock_movements": "Stock Movements",
+        }
+        if self.role == "Admin":
+            reports["audit_logs"] = "Audit Logs"
+
+        dialog = ttk.Toplevel(self.root)
+        dialog.title("Export Report Bundle")
+        frame = ttk.Frame(dialog, padding=10)
+        frame.grid(row=0, column=0, sticky="nsew")
+        selected = {}
+        status_labels = {}
+        for row, (name, title) in enumerate(reports.items()):
+            selected[name] = tk.BooleanVar(value=True)
+            ttk.Checkbutton(frame, text=title, variable=selected[name], bootstyle="primary").grid(row=row, column=0, padx=5, pady=3, sticky="w")
+            status_labels[name] = ttk.Label(frame, text="", width=28)
+            status_labels[name].grid(row=row, column=1, padx=5, pady=3, sticky="w")
+        start_button = ttk.Button(frame, text="Export...", bootstyle="success")
+        start_button.grid(row=len(reports), column=0, columnspan=2, pady=10)
+        start_button.configure(command=lambda: self.start_export_bundle(
+            dialog, start_button, [name for name, var in selected.items() if var.get()], status_labels
+        ))
+
+    def start_export_bundle(self, dialog, start_button, names, status_labels):
+        # Queries run on worker threads with one pooled connection per report; the UI only polls progress
+        if not names:
+            messagebox.showerror("Error", "Select at least one report", parent=dialog)
+            return
+        archive_path = filedialog.asksaveasfilename(
+            parent=dialog, defaultextension=".zip", filetypes=[("Zip archive", "*.zip")],
+            initialfile=f"reports_{datetime.now():%Y%m%d_%H%M%S}.zip"
+        )
+        if not archive_path:
+            return
+        start_button.configure(state="disabled")
+        for name in names:
+            status_labels[name].configure(text="Queued", bootstyle="secondary")
+        updates = queue.Queue()
+        pool = ConnectionPool(size=len(names), **self.db.connection_args)
+
+        def run():
+            try:
+                manifest = export_bundle(pool, names, archive_path,
+                                         progress=lambda name, state, rows: updates.put(("progress", name, state, rows)))
+                updates.put(("finished", manifest, None, None))
+            except Exception as e:
+                updates.put(("error", e, None, None))
+            finally:
+                pool.close()
+
+        def poll():
+            while True:
+                try:
+                    kind, first, state, rows = updates.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "progress":
+                    if status_labels[first].winfo_exists():
+                        style = {"running": "info", "done": "success", "failed": "danger"}[state]
+                        text = {"running": f"Exporting... {rows} rows", "done": f"Done: {rows} rows", "failed": "Failed"}[state]
+                        status_labels[first].configure(text=text, bootstyle=style)
+                    continue
+                if dialog.winfo_exists():
+                    start_button.configure(state="normal")
+                if kind == "finished":
+                    total = sum(entry["rows"] for entry in first["reports"])
+                    messagebox.showinfo("Success", f"Exported {len(first['reports'])} reports ({total} rows) to {first['path']}")
+                else:
+                    logging.error(f"Error exporting report bundle: {first}")
+                    messagebox.showerror("Error", f"Failed to export bundle: {first}")
+                return
+            self.root.after(100, poll)
+
+        threading.Thread(target=run, daemon=True).start()
+        self.root.after(100, poll)
+
+    def show_report(self, name, columns, rows, since):
+        # rows: (iid, values) pairs, iid None for append-only reports. since is where poll_changes
+        # continues from: an inventory version or the last id read
+        self.current_report = name
         for widget in self.report_display.winfo_children():
             widget.destroy()
-        tree = ttk.Treeview(self.report_display, columns=("Inventory ID", "Product ID", "Product", "Quantity", "Status", "Warehouse", "Zone", "Aisle", "Bin"), show="headings", bootstyle="primary")
-        tree.heading("Inventory ID", text="Inventory ID")
-        tree.heading("Product ID", text="Product ID")
-        tree.heading("Product", text="Product")
-        tree.heading("Quantity", text="Quantity")
-        tree.heading("Status", text="Status")
-        tree.heading("Warehouse", text="Warehouse")
-        tree.heading("Zone", text="Zone")
-        tree.heading("Aisle", text="Aisle")
-        tree.heading("Bin", text="Bin")
+        self.report_tree = ttk.Treeview(self.report_display, columns=columns, show="headings", bootstyle="primary")
+        for col in columns:
+            self.report_tree.heading(col, text=col)
+        self.report_rows = {}
+        self.report_since = since
+        self.upsert_report_rows(rows)
+        self.report_tree.pack(fill="both", expand=True)
+        ttk.Button(self.report_display, text="Export to CSV", command=lambda: self.export_to_csv(
+            columns, [self.report_rows[iid] for iid in self.report_tree.get_children()], f"{name}.csv"
+        ), bootstyle="success").pack(pady=5)
+
+    def upsert_report_rows(self, rows):
+        for iid, values in rows:
+            if iid is not None and self.report_tree.exists(iid):
+                self.report_tree.item(iid, values=values)
+            else:
+                iid = self.report_tree.insert("", "end", iid=iid, values=values)
+            self.report_rows[iid] = values
+
+    def remove_report_rows(self, iids):
+        for iid in iids:
+            if self.report_tree.exists(iid):
+                self.report_tree.delete(iid)
+                del self.report_rows[iid]
+
+    def update_report(self, versions, changed):
+        # Only rows written since the report was loaded are fetched. Inventory rows are updated in
+        # place by id, the append-only logs get their new rows; a reorder rule change re-runs the report
+        if not self.report_tree.winfo_exists():
+            return
+        name = self.current_report
+        if name == "inventory_summary" and "inventory" in changed:
+            self.upsert_report_rows((str(row[0]), row) for row in self.db.get_inventory_changes(self.report_since))
+            self.report_since = versions["inventory"]
+        elif name == "reorder_alerts" and "reorder_rules" in changed:
+            # A rule change can affect any row, so the report is re-run, off the UI thread
+            def job(db):
+                # The version is read first: the rows then come from the same snapshot
+                since = db.get_change_versions().get("inventory", 0)
+                return db.get_reorder_alert_rows(), since
+
+            def done(result, error):
+                if error:
+                    logging.error(f"Error reloading reorder alerts: {error}")
+                elif self.current_report == "reorder_alerts" and self.report_tree.winfo_exists():
+                    self.show_reorder_alerts(*result)
+
+            self.run_in_background(job, done)
+        elif name == "reorder_alerts":
+            rows = self.db.get_reorder_alert_rows(self.report_since)
+            self.upsert_report_rows((str(row[0]), row[1:5]) for row in rows if row[5])
+            self.remove_report_rows(str(row[0]) for row in rows if not row[5])
+            self.report_since = versions["inventory"]
+        elif name == "expiry_alerts":
+            self.report_since, alerts = self.db.get_expiry_alerts_since(self.report_since)
+            self.upsert_report_rows((None, alert) for alert in alerts)
+        elif name in ("audit_logs", "stock_movements"):
+            rows = getattr(self.db, f"get_{name}")(self.report_since)
+            self.upsert_report_rows((None, row) for row in rows)
+            if rows:
+                self.report_since = rows[-1][0]
+
+    def inventory_summary_report(self):
         summary = self.db.get_inventory_summary()
-        for row in summary:
-            tree.insert("", "end", values=row)
-        tree.pack(fill="both", expand=True)
-        ttk.Button(self.report_display, text="Export to CSV", command=lambda: self.export_to_csv(summary, "inventory_summary.csv"), bootstyle="success").pack(pady=5)
+        self.show_report("inventory_summary", SUMMARY_COLUMNS, [(str(row[0]), row) for row in summary],
+                         self.seen_versions.get("inventory", 0))
 
     def expiry_alerts_report(self):
-        for widget in self.report_display.winfo_children():
-            widget.destroy()
-        tree = ttk.Treeview(self.report_display, columns=("Product ID", "Batch Number", "Days to Expiry"), show="headings", bootstyle="primary")
-        tree.heading("Product ID", text="Product ID")
-        tree.heading("Batch Number", text="Batch Number")
-        tree.heading("Days to Expiry", text="Days to Expiry")
-        alerts = self.db.check_expiry_alerts()
-        for alert in alerts:
-            tree.insert("", "end", values=alert)
-        tree.pack(fill="both", expand=True)
-        ttk.Button(self.report_display, text="Export to CSV", command=lambda: self.export_to_csv(alerts, "expiry_alerts.csv"), bootstyle="success").pack(pady=5)
+        last_batch_id, alerts = self.db.get_expiry_alerts_since(0)
+        self.show_report("expiry_alerts", ("Product ID", "Batch Number", "Days to Expiry"),
+                         [(None, alert) for alert in alerts], last_batch_id)
 
     def reorder_alerts_report(self):
-        for widget in self.report_display.winfo_children():
-            widget.destroy()
-        tree = ttk.Treeview(self.report_display, columns=("Product ID", "Quantity", "Min Threshold", "Reorder Point"), show="headings", bootstyle="primary")
-        tree.heading("Product ID", text="Product ID")
-        tree.heading("Quantity", text="Quantity")
-        tree.heading("Min Threshold", text="Min Threshold")
-        tree.heading("Reorder Point", text="Reorder Point")
-        alerts = self.db.check_reorder_alerts()
-        for alert in alerts:
-            tree.insert("", "end", values=alert)
-        tree.pack(fill="both", expand=True)
-        ttk.Button(self.report_display, text="Export to CSV", command=lambda: self.export_to_csv(alerts, "reorder_alerts.csv"), bootstyle="success").pack(pady=5)
+        self.show_reorder_alerts(self.db.get_reorder_alert_rows(), self.seen_versions.get("inventory", 0))
+
+    def show_reorder_alerts(self, rows, since):
+        self.show_report("reorder_alerts", ("Product ID", "Quantity", "Min Threshold", "Reorder Point"),
+                         [(str(row[0]), row[1:5]) for row in rows], since)
 
     def audit_logs_report(self):
-        for widget in self.report_display.winfo_children():
-            widget.destroy()
-        tree = ttk.Treeview(self.report_display, columns=("Audit ID", "Inventory ID", "Action", "Reason", "Changed By", "Timestamp"), show="headings", bootstyle="primary")
-        tree.heading("Audit ID", text="Audit ID")
-        tree.heading("Inventory ID", text="Inventory ID")
-        tree.heading("Action", text="Action")
-        tree.heading("Reason", text="Reason")
-        tree.heading("Changed By", text="Changed By")
-        tree.heading("Timestamp", text="Timestamp")
-        self.db.cursor.execute('SELECT * FROM audit_logs')
-        logs = self.db.cursor.fetchall()
-        for log in logs:
-            tree.insert("", "end", values=log)
-        tree.pack(fill="both", expand=True)
-        ttk.Button(self.report_display, text="Export to CSV", command=lambda: self.export_to_csv(logs, "audit_logs.csv"), bootstyle="success").pack(pady=5)
+        logs = self.db.get_audit_logs()
+        self.show_report("audit_logs", ("Audit ID", "Inventory ID", "Action", "Reason", "Changed By", "Timestamp"),
+                         [(None, log) for log in logs], logs[-1][0] if logs else 0)
 
     def stock_movements_report(self):
-        for widget in self.report_display.winfo_children():
-            widget.destroy()
-        
-        columns = ("Movement ID", "Product ID", "Quantity", "From Location", "To Location", "Movement Type", "Timestamp")
-        tree = ttk.Treeview(self.report_display, columns=columns, show="headings", bootstyle="primary")
-
-        for col in columns:
-            tree.heading(col, text=col)
-
-        self.db.cursor.execute('SELECT movement_id, product_id, quantity, from_location, to_location, movement_type, timestamp FROM stock_movements')
-        movements = self.db.cursor.fetchall()
-
-        for movement in movements:
-            tree.insert("", "end", values=movement)
-        
-        tree.pack(fill="both", expand=True)
-        ttk.Button(self.report_display, text="Export to CSV", command=lambda: self.export_to_csv(movements, "stock_movements.csv"), bootstyle="success").pack(pady=5)
+        movements = self.db.get_stock_movements()
+        self.show_report("stock_movements", ("Movement ID", "Product ID", "Quantity", "From Location", "To Location", "Movement Type", "Timestamp"),
+                         [(None, movement) for movement in movements], movements[-1][0] if movements else 0)
 
-    def export_to_csv(self, data, filename):
+    def export_to_csv(self, columns, data, filename):
         try:
             with open(filename, "w", newline="") as f:
                 writer = csv.writer(f)
-                writer.writerow([col[0] for col in self.db.cursor.description] if self.db.cursor.description else data[0])
+                writer.writerow(columns)
                 writer.writerows(data)
             messagebox.showinfo("Success", f"Exported to {filename}")
         except Exception as e:
@@ -0,0 +1,161 @@
+import numpy as np
+
+# Column order of DatabaseManager.get_inventory_summary rows
+SUMMARY_COLUMNS = ("Inventory ID", "Product ID", "Product", "Quantity", "Status", "Warehouse", "Zone", "Aisle", "Bin")
+NUMERIC_COLUMNS = {"Inventory ID": "inventory_ids", "Product ID": "product_ids", "Quantity": "quantities"}
+ENCODED_COLUMNS = {"Product": "products", "Status": "statuses", "Warehouse": "warehouses",
+                   "Zone": "zones", "Aisle": "aisles", "Bin": "bins"}
+
+# Dictionary-encoded string column: each distinct value is stored once and rows hold small integer codes
+class EncodedColumn:
+    def __init__(self, dtype=np.int32):
+        self.dtype = dtype
+        self.values = []
+        self.code_of = {}
+        self.codes = np.zeros(0, dtype=dtype)
+
+    def encode(self, values):
+        for value in set(values).difference(self.code_of):
+            self.code_of[value] = len(self.values)
+            self.values.append(value)
+        return np.fromiter(map(self.code_of.__getitem__, values), dtype=self.dtype, count=len(values))
+
+    def append(self, values):
+        self.extend([self.encode(values)])
+
+    def extend(self, code_chunks):
+        self.codes = np.concatenate([self.codes] + code_chunks)
+
+    def set(self, positions, values):
+        self.codes[positions] = self.encode(values)
+
+    def matching(self, predicate):
+        # Boolean lookup table over distinct values; index it with codes to get a row mask
+        table = np.zeros(len(self.values), dtype=bool)
+        for code, value in enumerate(self.values):
+            table[code] = predicate(value)
+        return table[self.codes] if len(table) else np.zeros(len(self.codes), dtype=bool)
+
+    def sort_keys(self):
+        # Rank of every code in sorted value order, so sorting codes sorts the strings
+        order = sorted(range(len(self.values)), key=lambda code: (self.values[code] is None, self.values[code] or ""))
+        ranks = np.empty(len(self.values), dtype=np.int64)
+        ranks[order] = np.arange(len(self.values))
+        return ranks[self.codes] if len(ranks) else np.zeros(len(self.codes), dtype=np.int64)
+
+# Inventory summary held by column: typed arrays for ids/quantities, encoded columns for strings
+class InventoryModel:
+    def __init__(self):
+        self.inventory_ids = np.zeros(0, dtype=np.int32)
+        self.product_ids = np.zeros(0, dtype=np.int32)
+        self.quantities = np.zeros(0, dtype=np.int32)
+        self.products = EncodedColumn()
+        self.statuses = EncodedColumn(np.int8)
+        self.warehouses = EncodedColumn(np.int16)
+        self.zones = EncodedColumn()
+        self.aisles = EncodedColumn()
+        self.bins = EncodedColumn()
+        self._id_order = None
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        # Each chunk is a list of summary rows; columns are concatenated once at the end
+        model = cls()
+        model.append_chunks(chunks)
+        return model
+
+    def __len__(self):
+        return len(self.inventory_ids)
+
+    def append_chunks(self, chunks):
+        numeric = {"inventory_ids": [], "product_ids": [], "quantities": []}
+        encoded = {attr: [] for attr in ENCODED_COLUMNS.values()}
+        for rows in chunks:
+            if not rows:
+                continue
+            columns = list(zip(*rows))
+            numeric["inventory_ids"].append(np.array(columns[0], dtype=np.int32))
+            numeric["product_ids"].append(np.array(columns[1], dtype=np.int32))
+            numeric["quantities"].append(np.array([q or 0 for q in columns[3]], dtype=np.int32))
+            for attr, column in zip(("products", "statuses", "warehouses", "zones", "aisles", "bins"), columns[2:3] + columns[4:]):
+                encoded[attr].append(getattr(self, attr).encode(column))
+        if not numeric["inventory_ids"]:
+            return
+        for attr, arrays in numeric.items():
+            setattr(self, attr, np.concatenate([getattr(self, attr)] + arrays))
+        for attr, code_chunks in encoded.items():
+            getattr(self, attr).extend(code_chunks)
+        self._id_order = None
+
+    def append_rows(self, rows):
+        self.append_chunks([rows])
+
+    def positions_of(self, inventory_ids):
+        # Row positions for the given inventory ids (-1 where absent), via a sorted id index
+        if self._id_order is None:
+            self._id_order = np.argsort(self.inventory_ids, kind="stable")
+        inventory_ids = np.asarray(inventory_ids, dtype=np.int64)
+        if not len(self):
+            return np.full(len(inventory_ids), -1, dtype=np.int64)
+        sorted_ids = self.inventory_ids[self._id_order]
+        found = np.minimum(np.searchsorted(sorted_ids, inventory_ids), len(sorted_ids) - 1)
+        return np.where(sorted_ids[found] == inventory_ids, self._id_order[found], -1)
+
+    def upsert_rows(self, rows):
+        # Updates rows already in the model in place and appends new ones
+        if not rows:
+            return
+        positions = self.positions_of([row[0] for row in rows])
+        self.append_rows([row for row, position in zip(rows, positions) if position < 0])
+        updates = [row for row, position in zip(rows, positions) if position >= 0]
+        if not updates:
+            return
+        positions = positions[positions >= 0]
+        columns = list(zip(*updates))
+        self.product_ids[positions] = columns[1]
+        self.quantities[positions] = [q or 0 for q in columns[3]]
+        for attr, column in zip(("products", "statuses", "warehouses", "zones", "aisles", "bins"), columns[2:3] + columns[4:]):
+            getattr(self, attr).set(positions, column)
+
+    def row(self, i):
+        return (int(self.inventory_ids[i]), int(self.product_ids[i]), self.products.values[self.products.codes[i]],
+                int(self.quantities[i]), self.statuses.values[self.statuses.codes[i]],
+                self.warehouses.values[self.warehouses.codes[i]], self.zones.values[self.zones.codes[i]],
+                self.aisles.values[self.aisles.codes[i]], self.bins.values[self.bins.codes[i]])
+
+    def status_of(self, i):
+        return self.statuses.values[self.statuses.codes[i]]
+
+    def filter(self, product_text="", status=None, warehouse=None):
+        # Returns the row positions matching every given condition
+        mask = np.ones(len(self), dtype=bool)
+        term = product_text.strip().casefold()
+        if term:
+            mask &= self.products.matching(lambda name: term in (name or "").casefold())
+        if status:
+            mask &= self.statuses.matching(lambda value: value == status)
+        if warehouse:
+            mask &= self.warehouses.matching(lambda value: value == warehouse)
+        return np.flatnonzero(mask)
+
+    def sort(self, positions, column, descending=False):
+        if column in NUMERIC_COLUMNS:
+            keys = getattr(self, NUMERIC_COLUMNS[column])[positions]
+        else:
+            keys = getattr(self, ENCODED_COLUMNS[column]).sort_keys()[positions]
+        order = np.argsort(keys, kind="stable")
+        if descending:
+            order = order[::-1]
+        return positions[order]
+
+    def totals_by(self, attr, positions=None):
+        # Quantity per distinct value of an encoded column, e.g. per warehouse
+        column = getattr(self, attr)
+        codes = column.codes if positions is None else column.codes[positions]
+        quantities = self.quantities if positions is None else self.quantities[positions]
+        totals = np.bincount(codes, weights=quantities, minlength=len(column.values))
+        present = np.bincount(codes, minlength=len(column.values))
+        return [(column.values[code], int(totals[code])) for code in np.flatnonzero(present)]
+
+    def count_at_or_below(self, quantity):
+        return int(np.count_nonzero(self.quantities <= quantity))
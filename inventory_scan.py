@@ -0,0 +1,136 @@
+from collections import OrderedDict
+
+# Barcodes: "L<id>" / "LOC-<id>" selects the current location, "<id>" or "P<id>" is a product,
+# and an optional "<qty>*" prefix multiplies a product scan (e.g. "12*P1001").
+def parse_barcode(code):
+    code = code.strip().upper()
+    quantity = 1
+    if "*" in code:
+        count, _, code = code.partition("*")
+        quantity = int(count)
+        if quantity <= 0:
+            raise ValueError("Scan quantity must be positive")
+    for prefix in ("LOC-", "L"):
+        if code.startswith(prefix) and code[len(prefix):].isdigit():
+            return "location", int(code[len(prefix):]), quantity
+    if code.startswith("P"):
+        code = code[1:]
+    if not code.isdigit():
+        raise ValueError(f"Unrecognized barcode: {code}")
+    return "product", int(code), quantity
+
+# Scans in this mode are counted quantities for a cycle count; they are never posted as movements
+COUNT_MODE = "count"
+
+# Pending scans merged into one quantity line per (movement type, product, location)
+class ScanSession:
+    def __init__(self, movement_type="restock"):
+        self.movement_type = movement_type
+        self.location_id = None
+        self.lines = OrderedDict()
+        self.rejected = OrderedDict()
+        self.history = []
+        self.scans = 0
+        self.posted_units = 0
+
+    def scan(self, product_id, quantity=1):
+        if self.location_id is None:
+            raise ValueError("Scan a location barcode first")
+        key = (self.movement_type, product_id, self.location_id)
+        self.lines[key] = self.lines.get(key, 0) + quantity
+        self.history.append((key, quantity))
+        self.scans += 1
+        return key, self.lines[key]
+
+    def undo(self):
+        # Only scans that have not been flushed yet can be undone
+        if not self.history:
+            return None
+        key, quantity = self.history.pop()
+        remaining = self.lines[key] - quantity
+        if remaining:
+            self.lines[key] = remaining
+        else:
+            del self.lines[key]
+        self.scans -= 1
+        return key, remaining
+
+    @property
+    def pending_units(self):
+        return sum(self.lines.values())
+
+    def drain(self):
+        # Takes the movement lines; count lines stay until take_counts()
+        lines = OrderedDict((key, qty) for key, qty in self.lines.items() if key[0] != COUNT_MODE)
+        self.lines = OrderedDict((key, qty) for key, qty in self.lines.items() if key[0] == COUNT_MODE)
+        self.history = [entry for entry in self.history if entry[0][0] == COUNT_MODE]
+        return lines
+
+    def counts(self):
+        # (product_id, location_id, counted_quantity) tuples for DatabaseManager.create_cycle_count
+        return [(product_id, location_id, qty) for (mode, product_id, location_id), qty in self.lines.items()
+                if mode == COUNT_MODE]
+
+    def take_counts(self):
+        # Like counts(), but also clears them; call once the count has been stored
+        counts = self.counts()
+        self.lines = OrderedDict((key, qty) for key, qty in self.lines.items() if key[0] != COUNT_MODE)
+        self.history = [entry for entry in self.history if entry[0][0] != COUNT_MODE]
+        return counts
+
+    def restore(self, lines):
+        # Put back lines whose flush failed, ahead of anything scanned since
+        merged = OrderedDict(lines)
+        for key, quantity in self.lines.items():
+            merged[key] = merged.get(key, 0) + quantity
+        self.lines = merged
+
+    def mark_posted(self, lines):
+        self.posted_units += sum(lines.values())
+
+    def reject(self, key, quantity, error):
+        # Lines the database refused (e.g. a pick where there is no stock); kept for review, never re-posted
+        total = self.rejected.get(key, (0, None))[0] + quantity
+        self.rejected[key] = (total, error)
+        return total
+
+    def clear_rejected(self):
+        keys = list(self.rejected)
+        self.rejected.clear()
+        return keys
+
+    @staticmethod
+    def to_movements(lines):
+        movements = []
+        for (movement_type, product_id, location_id), quantity in lines.items():
+            if movement_type in ("sale", "transfer"):
+                movements.append((product_id, quantity, location_id, None, movement_type))
+            else:
+                movements.append((product_id, quantity, None, location_id, movement_type))
+        return movements
+
+
+def post_lines(db, lines):
+    # Posts the lines in one transaction. A refused line (ValueError, e.g. a pick where there is no
+    # stock) fails the whole transaction, so the lines are then retried one at a time to isolate it.
+    # Returns (posted lines, [(key, quantity, message)] refused, error that stopped posting or None);
+    # lines in neither list were not posted.
+    try:
+        db.record_movements(ScanSession.to_movements(lines))
+        return lines, [], None
+    except ValueError as e:
+        if len(lines) == 1:
+            key, quantity = next(iter(lines.items()))
+            return OrderedDict(), [(key, quantity, str(e))], None
+    except Exception as e:
+        return OrderedDict(), [], e
+    posted, rejected = OrderedDict(), []
+    for key, quantity in lines.items():
+        try:
+            db.record_movements(ScanSession.to_movements({key: quantity}))
+            posted[key] = quantity
+        except ValueError as e:
+            rejected.append((key, quantity, str(e)))
+        except Exception as e:
+            return posted, rejected, e
+    return posted, rejected, None
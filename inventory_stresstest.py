@@ -0,0 +1,123 @@
+# Concurrency stress test for the optimistic inventory writes: many threads, each on its own
+# connection, add stock to the same few inventory rows through both write paths
+# (add_inventory's compare-and-set and record_movements' atomic deltas). The rows do not exist
+# yet, so the first writes race to insert them. At the end every location must hold exactly one
+# row whose quantity equals the sum of every committed write, i.e. no update was lost.
+#
+#   python inventory_stresstest.py --threads 32 --iterations 200 --rows 1
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+
+import mysql.connector
+
+from database_manager import ConnectionPool, WRITE_METRICS
+from inventory_cli import add_connection_arguments, connection_args
+
+
+def setup_rows(db, rows):
+    # A dedicated product and locations so the test never touches real stock
+    label = f"Stress test {time.strftime('%Y%m%d%H%M%S')}"
+    product_id = db.add_product(label, "Concurrency stress test", "Test")
+    db.add_warehouse(label, "Test")
+    warehouse_id = max(w[0] for w in db.get_warehouses())
+    location_ids = []
+    for n in range(rows):
+        db.add_location(warehouse_id, "Stress", "S1", f"Bin {n + 1}")
+        db.cursor.execute('SELECT MAX(location_id) FROM locations WHERE warehouse_id = %s', (warehouse_id,))
+        location_ids.append(db.cursor.fetchone()[0])
+    return product_id, location_ids
+
+
+def worker(pool, product_id, location_ids, iterations, rng, committed, errors, lock):
+    with pool.connection() as db:
+        for _ in range(iterations):
+            location_id = rng.choice(location_ids)
+            quantity = rng.randint(1, 5)
+            try:
+                if rng.random() < 0.5:
+                    db.add_inventory(product_id, location_id, quantity, "available")
+                else:
+                    db.record_movements([(product_id, quantity, None, location_id, "restock")])
+            except mysql.connector.Error as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                committed[location_id] += quantity
+
+
+def run(args):
+    pool = ConnectionPool(size=args.threads, **connection_args(args))
+    try:
+        with pool.connection() as db:
+            product_id, location_ids = setup_rows(db, args.rows)
+        WRITE_METRICS.reset()
+        committed = {location_id: 0 for location_id in location_ids}
+        errors = []
+        lock = threading.Lock()
+        rng = random.Random(args.seed)
+        threads = [threading.Thread(target=worker, args=(pool, product_id, location_ids, args.iterations,
+                                                         random.Random(rng.random()), committed, errors, lock))
+                   for _ in range(args.threads)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        with pool.connection() as db:
+            db.conn.commit()
+            _, inventory = db.get_product(product_id)
+    finally:
+        pool.close()
+    stored = {}
+    row_counts = {}
+    for _, location_id, quantity, _ in inventory:
+        stored[location_id] = stored.get(location_id, 0) + quantity
+        row_counts[location_id] = row_counts.get(location_id, 0) + 1
+    duplicates = {location_id: count for location_id, count in row_counts.items() if count > 1}
+    lost = {location_id: committed[location_id] - stored.get(location_id, 0)
+            for location_id in location_ids if committed[location_id] != stored.get(location_id, 0)}
+    writes = args.threads * args.iterations
+    return {
+        "threads": args.threads,
+        "rows": args.rows,
+        "writes": writes,
+        "failed_writes": len(errors),
+        "duration_s": round(elapsed, 2),
+        "writes_per_s": round(writes / elapsed, 1),
+        "lost_updates": lost,
+        "duplicate_rows": duplicates,
+        "metrics": WRITE_METRICS.snapshot(),
+        "product_id": product_id,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="inventory_stresstest", description="Check that concurrent inventory writes lose no updates")
+    add_connection_arguments(parser)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=100, help="writes per thread")
+    parser.add_argument("--rows", type=int, default=1, help="inventory rows the writes are spread over (1 = one hot SKU)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--verbose", action="store_true", help="log progress to stderr")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        result = run(args)
+    except (OSError, mysql.connector.Error) as e:
+        print(json.dumps({"ok": False, "error": str(e)}))
+        return 1
+    ok = not result["lost_updates"] and not result["duplicate_rows"] and not result["failed_writes"]
+    print(json.dumps({"ok": ok, **result}))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
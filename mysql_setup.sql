@@ -10,7 +10,8 @@ CREATE TABLE products (
     product_id INT AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(255) NOT NULL,
     description TEXT,
-    category VARCHAR(100)
+    category VARCHAR(100),
+    INDEX idx_products_name (name)
 );
 
 -- Create the warehouses table
@@ -37,6 +38,10 @@ CREATE TABLE inventory (
     location_id INT,
     quantity INT,
     status ENUM('available', 'reserved', 'in-transit', 'damaged'),
+    change_seq BIGINT NOT NULL DEFAULT 0,
+    version INT NOT NULL DEFAULT 0,
+    INDEX idx_inventory_change_seq (change_seq),
+    UNIQUE KEY uq_inventory_product_location (product_id, location_id),
     FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE,
     FOREIGN KEY (location_id) REFERENCES locations(location_id) ON DELETE CASCADE
 );
@@ -52,6 +57,16 @@ CREATE TABLE serial_batches (
     FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE
 );
 
+-- Create the batch_stock table (quantity of each batch held at each location)
+CREATE TABLE batch_stock (
+    batch_id INT,
+    location_id INT,
+    quantity INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (batch_id, location_id),
+    FOREIGN KEY (batch_id) REFERENCES serial_batches(id) ON DELETE CASCADE,
+    FOREIGN KEY (location_id) REFERENCES locations(location_id) ON DELETE CASCADE
+);
+
 -- Create the stock_movements table
 CREATE TABLE stock_movements (
     movement_id INT AUTO_INCREMENT PRIMARY KEY,
@@ -87,6 +102,31 @@ CREATE TABLE audit_logs (
     FOREIGN KEY (inventory_id) REFERENCES inventory(inventory_id) ON DELETE CASCADE
 );
 
+-- Create the cycle_counts table (one physical count of a warehouse or zone)
+CREATE TABLE cycle_counts (
+    count_id INT AUTO_INCREMENT PRIMARY KEY,
+    warehouse_id INT NOT NULL,
+    zone VARCHAR(50),
+    status ENUM('open', 'applied') NOT NULL DEFAULT 'open',
+    created_by VARCHAR(100),
+    created_at DATETIME,
+    applied_by VARCHAR(100),
+    applied_at DATETIME,
+    FOREIGN KEY (warehouse_id) REFERENCES warehouses(warehouse_id) ON DELETE CASCADE
+);
+
+-- Create the cycle_count_lines table (counted quantity per product and location)
+CREATE TABLE cycle_count_lines (
+    count_id INT,
+    product_id INT,
+    location_id INT,
+    counted_quantity INT NOT NULL,
+    PRIMARY KEY (count_id, location_id, product_id),
+    FOREIGN KEY (count_id) REFERENCES cycle_counts(count_id) ON DELETE CASCADE,
+    FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE CASCADE,
+    FOREIGN KEY (location_id) REFERENCES locations(location_id) ON DELETE CASCADE
+);
+
 -- Create the users table
 CREATE TABLE users (
     user_id INT AUTO_INCREMENT PRIMARY KEY,
@@ -95,5 +135,15 @@ CREATE TABLE users (
     role ENUM('Admin', 'Warehouse Manager', 'Auditor')
 );
 
+-- Create the change_versions table (one version counter per table, bumped on every write)
+CREATE TABLE change_versions (
+    table_name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO change_versions (table_name) VALUES
+    ('products'), ('warehouses'), ('locations'), ('inventory'),
+    ('serial_batches'), ('batch_stock'), ('stock_movements'), ('reorder_rules'), ('audit_logs');
+
 -- Insert a default admin user
 INSERT INTO users (username, password, role) VALUES ('admin', 'admin123', 'Admin');
\ No newline at end of file